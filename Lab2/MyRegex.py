@@ -2,76 +2,646 @@ from RegexLexer import *
 from RegexParser import *
 from RegexNFA import *
 from RegexDFA import *
+from RegexStats import CompileStats
+import RegexDerivatives
+from RegexGlushkov import BitParallelMatcher
+from RegexFollowpos import followpos_to_dfa
+from RegexStream import StreamMatcher, BufferedMatcher, afinditer
+from RegexCodegen import dfa_to_python
+import RegexPlanner
+from RegexEquivalence import dfa_equivalent, dfa_is_subset, dfa_is_empty
+from RegexBudget import Budget, BudgetExceeded, BudgetFallbackWarning
+from RegexBytes import ByteDFA, BYTES_TYPES, as_byte_view
+from RegexMatch import leftmost_shortest, iter_spans
+from RegexCombinators import LanguageExpr, as_expr
+from RegexAlgebra import to_flat, from_flat
+from RegexWords import build_word_dfa
+from RegexShared import SharedDFA
+from RegexCounting import PathCounter
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from itertools import accumulate
+import hashlib
+import threading
+import warnings
 
 
-class MatchResult:
-    def __init__(self, start, end, full_match, groups):
-        self.start = start  # Начальная позиция совпадения
-        self.end = end  # Конечная позиция совпадения
-        self.full_match = full_match  # Совпавшая подстрока
-        self.groups = groups  # Словарь именованных групп
+class _Frozen:
+    """
+    Основа скомпилированных объектов: после __init__ атрибуты не меняются,
+    поэтому один объект можно разделять между потоками без блокировок.
+    Ленивые части (минимальный ДКА, байтовый ДКА, запасной движок) строятся
+    ровно один раз под замком объекта. Объекты с profile=True копят счётчики
+    в stats и для параллельной работы не предназначены.
+    При передаче в другой процесс (pickle) объект не копируется, а компилируется
+    там заново по аргументам конструктора; собранные объекты кешируются (см. _rebuild).
+    copy.copy и copy.deepcopy, как у re.Pattern, возвращают сам объект, а
+    объект с профилем — новый, со своими счётчиками.
+    """
 
-    def __getitem__(self, key):
-        return self.groups.get(key, None)  # Позволяет доступ к группам по имени через []
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError(f"{type(self).__name__} object is immutable")
+        object.__setattr__(self, name, value)
 
-    def __iter__(self):
-        return iter(self.groups.items())  # Позволяет итерироваться по группам
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} object is immutable")
 
+    def _freeze(self, *args):
+        """args — аргументы конструктора, по которым объект собирается заново после pickle."""
+        object.__setattr__(self, '_args', args)
+        object.__setattr__(self, '_lock', threading.RLock())
+        object.__setattr__(self, '_frozen', True)
 
-class CompiledNFA:
-    def __init__(self, pattern):
+    def __reduce__(self):
+        return _rebuild, (type(self), self._args, self._rebuild_key())
+
+    def _rebuild_key(self):
+        """Ключ кеша _rebuild по аргументам конструктора; None — не кешировать."""
+        if self.stats.profiling:
+            return None
+        return tuple((arg.max_states, arg.max_memory, arg.max_seconds) if isinstance(arg, Budget) else arg
+                     for arg in self._args)
+
+    def __copy__(self):
+        if self.stats.profiling:
+            factory, args = self.__reduce__()
+            return factory(*args)
+        return self
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def _cached(self, name, build):
+        """Значение ленивого атрибута name; build() вызывается не более одного раза."""
+        value = self.__dict__.get(name)
+        if value is None:
+            with self._lock:
+                value = self.__dict__.get(name)
+                if value is None:
+                    value = build()
+                    object.__setattr__(self, name, value)
+        return value
+
+    def _map(self, func, strings, executor, max_workers):
+        if executor is not None:
+            return list(executor.map(func, strings))
+        with ThreadPoolExecutor(max_workers) as pool:
+            return list(pool.map(func, strings))
+
+    def match_many(self, strings, executor=None, max_workers=None) -> list:
+        """
+        match для каждой строки; результаты — в порядке входа.
+        executor — любой concurrent.futures.Executor, по умолчанию создаётся
+        ThreadPoolExecutor(max_workers) на время вызова. В ProcessPoolExecutor
+        каждый рабочий процесс один раз компилирует выражение заново (см. __reduce__).
+        """
+        return self._map(self.match, strings, executor, max_workers)
+
+    def search_many(self, strings, executor=None, max_workers=None) -> list:
+        """search для каждой строки; результаты — в порядке входа (см. match_many)."""
+        return self._map(self.search, strings, executor, max_workers)
+
+
+class CompiledNFA(_Frozen):
+    def __init__(self, pattern, profile=False):
         self.pattern = pattern
-        self.tokens = RegexLexer(pattern).lex()
-        self.ast = RegexParser(self.tokens).parse()
-        self.nfa = NFAConstructor().build(self.ast)
+        self.stats = CompileStats(profiling=profile)
+        with self.stats.stage("parse"):
+            self.tokens = RegexLexer(pattern).lex()
+            self.ast = RegexParser(self.tokens).parse()
+        with self.stats.stage("nfa"):
+            self.nfa = NFAConstructor().build(self.ast)
+        self.stats.record_size("nfa", collect_states(self.nfa))
+        # Счётчики передаются в симуляцию только при включённом профилировании
+        self._profile = self.stats if profile else None
+        self._freeze(pattern, profile)
 
     def match(self, string):
-        return match_nfa(self.nfa, string)
+        return match_nfa(self.nfa, string, self._profile)
 
     def search(self, string):
-        return search_nfa(self.nfa, string)
+        return search_nfa(self.nfa, string, self._profile)
+
+    def is_match(self, string) -> bool:
+        """То же, что match(string) is not None."""
+        return match_nfa(self.nfa, string) is not None
+
+    def fullmatch_bool(self, string) -> bool:
+        """Совпадает ли выражение со всей строкой."""
+        return accepts_nfa(self.nfa, string)
 
     def draw(self, name):
         draw_nfa(self.nfa, name)
 
 
-class CompiledDFA:
-    def __init__(self, pattern):
+ENGINES = ("thompson", "derivatives", "followpos")
+
+
+class CompiledDFA(_Frozen):
+    """
+    Скомпилированный ДКА. engine выбирает способ построения:
+    - "thompson": РВ -> НКА Томпсона -> ДКА (метод подмножеств)
+    - "derivatives": ДКА строится прямо по дереву через производные Бржозовского;
+      такие объекты поддерживают дополнение и пересечение на уровне выражений
+    - "followpos": ДКА строится прямо по дереву через followpos (без НКА)
+
+    search — самое левое, затем кратчайшее непустое вхождение, как у search_nfa
+    и остальных движков (а не первый суффикс, целиком подходящий под выражение).
+
+    Без budget движок "thompson" берёт минимальный ДКА из кеша на интернированных
+    узлах (node_dfa): семейство выражений с общими частями детерминизирует их один раз.
+    НКА такой объект не строит (nfa — None, этапа "nfa" в stats нет).
+
+    budget (RegexBudget.Budget) ограничивает построение и минимизацию ДКА.
+    Если построение не уложилось в бюджет, объект остаётся рабочим: match/search
+    выполняются ленивым ДКА на производных (или НКА, если есть ссылки на группы),
+    в fallback сохраняется исключение BudgetExceeded и выдаётся BudgetFallbackWarning.
+    Все операции сопоставления (match, search, is_match, finditer, stream, afinditer,
+    в том числе по байтам) в этом режиме тоже идут через запасной движок. Операции,
+    которым нужен сам полный ДКА (min_dfa, bytes_dfa, дополнение, пересечение, ...),
+    поднимают сохранённое BudgetExceeded. Если в бюджет не уложилась только
+    минимизация, вместо минимального используется исходный ДКА.
+
+    match/search/is_match/finditer принимают и bytes, bytearray, memoryview:
+    тогда поиск идёт по байтовому ДКА над UTF-8 (bytes_dfa) без декодирования,
+    а границы совпадений — смещения в байтах.
+    """
+
+    def __init__(self, pattern, profile=False, engine="thompson", budget=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
         self.pattern = pattern
-        self.tokens = RegexLexer(pattern).lex()
-        self.ast = RegexParser(self.tokens).parse()
-        self.nfa = NFAConstructor().build(self.ast)
-        self.dfa = nfa_to_dfa(self.nfa)
+        self.engine = engine
+        self.budget = budget
+        self.fallback = None
+        self.stats = CompileStats(profiling=profile)
+        with self.stats.stage("parse"):
+            self.tokens = RegexLexer(pattern).lex()
+            self.ast = RegexParser(self.tokens).parse()
+        self.nfa = None
+        self.expr = None
+        self.dfa = None
         self._min_dfa = None
+        try:
+            if engine == "derivatives":
+                with self.stats.stage("dfa"):
+                    self.expr = RegexDerivatives.from_ast(self.ast)
+                    self.dfa = RegexDerivatives.build_dfa(self.expr, budget=budget)
+            elif engine == "followpos":
+                with self.stats.stage("dfa"):
+                    self.dfa = followpos_to_dfa(self.ast, budget)
+            elif budget is None and is_group_free(self.ast):
+                # Минимальный ДКА кешируется на интернированном узле и общих поддеревьях
+                # (node_dfa), у объекта — своя копия; НКА строится лишь при надобности
+                with self.stats.stage("dfa"):
+                    self.dfa = self._min_dfa = copy_dfa(node_dfa(self.ast))
+                accelerate_dfa(self.dfa)
+            else:
+                with self.stats.stage("nfa"):
+                    self.nfa = NFAConstructor().build(self.ast)
+                self.stats.record_size("nfa", collect_states(self.nfa))
+                with self.stats.stage("dfa"):
+                    self.dfa = nfa_to_dfa(self.nfa, budget)
+        except BudgetExceeded as exc:
+            self.dfa = None
+            self._fall_back(exc)
+        else:
+            self.stats.record_size("dfa", self.dfa.states)
+        self._bytes_dfa = None
+        self._counter = None
+        self._lazy = None
+        self._profile = self.stats if profile else None
+        self._freeze(pattern, profile, engine, budget)
+
+    @classmethod
+    def from_dfa(cls, dfa, pattern=None, minimal=False) -> 'CompiledDFA':
+        """
+        Обёртка над готовым DFA (результат SetAlgebra, построителя словарей и т.п.):
+        те же match/search/операции над языками, что и у скомпилированного выражения.
+        DFA переходит во владение объекта (при minimal=True ускоряется на месте);
+        minimal=True — DFA уже минимален и повторно не минимизируется.
+        """
+        compiled = cls.__new__(cls)
+        compiled.pattern = pattern
+        compiled.engine = "dfa"
+        compiled.budget = None
+        compiled.fallback = None
+        compiled.stats = CompileStats()
+        compiled.tokens = compiled.ast = None
+        compiled.nfa = None
+        compiled.expr = None
+        compiled.dfa = dfa
+        compiled.stats.record_size("dfa", dfa.states)
+        compiled._min_dfa = None
+        if minimal:
+            accelerate_dfa(dfa)
+            compiled._min_dfa = dfa
+        compiled._bytes_dfa = None
+        compiled._counter = None
+        compiled._lazy = None
+        compiled._profile = None
+        compiled._freeze()
+        return compiled
+
+    def __reduce__(self):
+        if self._args:
+            return super().__reduce__()
+        # Обёртка над готовым DFA: pattern нет, граф DFAState pickle не осиливает
+        # по глубине рекурсии — передаётся каноническая плоская форма min_dfa,
+        # а ключом кеша служит её хеш, посчитанный здесь один раз
+        flat, digest = self._cached('_flat', self._flat_form)
+        return _rebuild, (type(self)._from_flat, (flat, self.pattern), (digest, self.pattern))
+
+    def _flat_form(self):
+        flat = to_flat(self.min_dfa)
+        return flat, hashlib.blake2b(repr(flat).encode('utf-8'), digest_size=16).hexdigest()
+
+    @classmethod
+    def _from_flat(cls, flat, pattern):
+        return cls.from_dfa(from_flat(flat), pattern, minimal=True)
+
+    def _fall_back(self, exc):
+        object.__setattr__(self, 'fallback', exc)
+        warnings.warn(f"{self.pattern!r}: {exc}; falling back", BudgetFallbackWarning, stacklevel=3)
+
+    def _full_dfa(self):
+        if self.dfa is None:
+            raise self.fallback
+        return self.dfa
 
     @property
     def min_dfa(self):
-        if self._min_dfa is None:
-            self._min_dfa = minimize_dfa(self.dfa)
-        return self._min_dfa
+        return self._cached('_min_dfa', self._minimize)
+
+    def _minimize(self):
+        dfa = self._full_dfa()
+        try:
+            with self.stats.stage("minimize"):
+                min_dfa = minimize_dfa(dfa, budget=self.budget)
+        except BudgetExceeded as exc:
+            self._fall_back(exc)
+            min_dfa = dfa
+        # match/search/is_match ходят по min_dfa — ускоряется именно он
+        accelerate_dfa(min_dfa)
+        self.stats.record_size("min_dfa", min_dfa.states)
+        return min_dfa
+
+    @property
+    def bytes_dfa(self) -> ByteDFA:
+        return self._cached('_bytes_dfa', lambda: ByteDFA.from_dfa(self.min_dfa))
+
+    def _fallback_engine(self):
+        try:
+            return RegexDerivatives.DerivativeDFA(RegexDerivatives.from_ast(self.ast))
+        except ValueError:
+            # Ссылки на группы — остаётся только НКА
+            object.__setattr__(self, 'nfa', self.nfa or NFAConstructor().build(self.ast))
+            return self.nfa
+
+    def _fallback_accepts(self, string):
+        """Полное совпадение без полного ДКА: ленивый ДКА на производных или НКА."""
+        engine = self._cached('_lazy', self._fallback_engine)
+        if engine is self.nfa:
+            return accepts_nfa(self.nfa, string)
+        return engine.accepts(string)
+
+    def _fallback_find(self, string, pos=0):
+        """Самое левое, затем кратчайшее непустое вхождение без полного ДКА: (начало, конец) или None."""
+        engine = self._cached('_lazy', self._fallback_engine)
+        if engine is not self.nfa:
+            return engine.find(string, pos)
+        return leftmost_shortest(self._nfa_shortest_end, string, pos)
+
+    def _nfa_shortest_end(self, string, start):
+        result = match_nfa(self.nfa, string, start=start)
+        return -1 if result is None else result.span()[1]
+
+    def _fallback_byte_spans(self, data):
+        """
+        Вхождения в байтах без полного ДКА: поиск идёт по декодированной строке,
+        границы переводятся в смещения в байтах. Некорректные байты декодируются
+        в суррогаты (surrogateescape) — ни с одним символом выражения они не совпадают.
+        """
+        text = bytes(as_byte_view(data)).decode('utf-8', 'surrogateescape')
+        offsets = list(accumulate((len(ch.encode('utf-8', 'surrogateescape')) for ch in text), initial=0))
+        for start, end in iter_spans(self._fallback_find, text):
+            yield offsets[start], offsets[end]
+
+    def _fallback_accepts_bytes(self, data):
+        return self._fallback_accepts(bytes(as_byte_view(data)).decode('utf-8', 'surrogateescape'))
 
     def match(self, string):
-        return match_dfa(self.dfa, string)
+        if isinstance(string, BYTES_TYPES):
+            if self.dfa is None:
+                accepted = self._fallback_accepts_bytes(string)
+                return MatchResult(string, 0, len(as_byte_view(string))) if accepted else None
+            return self.bytes_dfa.match(string)
+        if self.dfa is None:
+            return MatchResult(string, 0, len(string)) if self._fallback_accepts(string) else None
+        return match_dfa(self.min_dfa, string, self._profile)
 
     def search(self, string):
-        return search_dfa(self.dfa, string)
+        if isinstance(string, BYTES_TYPES):
+            if self.dfa is None:
+                span = next(self._fallback_byte_spans(string), None)
+                return MatchResult(string, *span) if span is not None else None
+            return self.bytes_dfa.search(string)
+        if self.dfa is None:
+            span = self._fallback_find(string)
+            return MatchResult(string, *span) if span is not None else None
+        return search_dfa(self.min_dfa, string, self._profile)
+
+    def is_match(self, string) -> bool:
+        """Булев быстрый путь для match: ничего не выделяет."""
+        if isinstance(string, BYTES_TYPES):
+            if self.dfa is None:
+                return self._fallback_accepts_bytes(string)
+            return self.bytes_dfa.accepts(string)
+        if self.dfa is None:
+            return self._fallback_accepts(string)
+        return accepts_dfa(self.min_dfa, string)
+
+    def fullmatch_bool(self, string) -> bool:
+        # Для ДКА match и так требует совпадения со всей строкой
+        return self.is_match(string)
+
+    def stream(self):
+        """
+        Потоковый поиск: matcher.feed(chunk) / matcher.close().
+        Без полного ДКА поток идёт по ленивому ДКА на производных, а если есть
+        ссылки на группы — через BufferedMatcher (НКА по всему входу при close).
+        """
+        if self.dfa is None:
+            engine = self._cached('_lazy', self._fallback_engine)
+            if engine is self.nfa:
+                return BufferedMatcher(self._fallback_find)
+            return StreamMatcher(engine.dfa, engine.step)
+        return StreamMatcher(self.min_dfa)
+
+    def finditer(self, string):
+        """Все непересекающиеся вхождения (самое левое, затем кратчайшее) по очереди."""
+        if isinstance(string, BYTES_TYPES):
+            if self.dfa is None:
+                for span in self._fallback_byte_spans(string):
+                    yield MatchResult(string, *span)
+                return
+            yield from self.bytes_dfa.finditer(string)
+            return
+        matcher = self.stream()
+        yield from matcher.feed(string)
+        yield from matcher.close()
+
+    def afinditer(self, source, chunk_size=65536, encoding='utf-8'):
+        """Асинхронный finditer по asyncio.StreamReader или async-итератору кусков."""
+        return afinditer(self.stream(), source, chunk_size, encoding)
+
+    @property
+    def counter(self) -> PathCounter:
+        return self._cached('_counter', lambda: PathCounter(self.min_dfa))
+
+    def count(self, n: int) -> int:
+        """Сколько строк длины n принимает выражение (считается по минимальному ДКА за O(log n) шагов)."""
+        return self.counter.count(n)
+
+    def count_upto(self, n: int) -> int:
+        """Сколько строк длины не больше n принимает выражение."""
+        return self.counter.count_upto(n)
+
+    def sample(self, length: int, rng=None) -> str:
+        """Случайная принимаемая строка длины length, все такие строки равновероятны."""
+        return self.counter.sample(length, rng)
+
+    def enumerate(self, max_len: int):
+        """Генератор принимаемых строк длины не больше max_len в shortlex-порядке."""
+        return self.counter.enumerate(max_len)
 
     def to_regex(self):
         return dfa_to_regex(self.min_dfa)
 
+    def to_python(self) -> str:
+        """Исходный код самостоятельного модуля с функциями match/search для минимального ДКА."""
+        return dfa_to_python(self.min_dfa, self.pattern)
+
+    def share(self, name=None) -> SharedDFA:
+        """
+        Минимальный ДКА в блоке разделяемой памяти: рабочие процессы подключаются
+        к нему по имени (SharedDFA.attach) или получают сам SharedDFA аргументом.
+        Блок удаляется вызовом unlink (или при выходе из with).
+        """
+        return SharedDFA.export(self.min_dfa, name)
+
     def complement_dfa(self):
-        return complement_dfa(self.dfa)
+        if self.expr is not None:
+            return RegexDerivatives.build_dfa(RegexDerivatives.complement(self.expr), budget=self.budget)
+        return complement_dfa(self._full_dfa())
 
     def intersect(self, other):
-        return intersect_dfa(self.dfa, other.dfa)
+        if self.expr is not None and other.expr is not None:
+            return RegexDerivatives.build_dfa(RegexDerivatives.intersection(self.expr, other.expr),
+                                              budget=self.budget)
+        return intersect_dfa(self._full_dfa(), other._full_dfa(), self.budget)
+
+    # A & ~B | C — ленивые выражения над языками (RegexCombinators): компоненты
+    # прогоняются одновременно, автомат-произведение не строится
+    def __and__(self, other) -> LanguageExpr:
+        return as_expr(self) & other
+
+    def __or__(self, other) -> LanguageExpr:
+        return as_expr(self) | other
+
+    def __invert__(self) -> LanguageExpr:
+        return ~as_expr(self)
+
+    def equivalent(self, other):
+        """Задают ли выражения один язык; при отличии — кратчайший контрпример."""
+        return dfa_equivalent(self.min_dfa, _as_dfa(other))
+
+    def is_subset_of(self, other):
+        """Содержится ли язык в языке other; иначе — кратчайшая лишняя строка."""
+        return dfa_is_subset(self.min_dfa, _as_dfa(other))
+
+    def is_empty(self):
+        """Пуст ли язык; иначе — кратчайшая принимаемая строка."""
+        return dfa_is_empty(self.min_dfa)
 
     def draw(self, name):
-        draw_dfa(self.dfa, name)
+        draw_dfa(self._full_dfa(), name)
+
+
+REBUILT_CACHE_SIZE = 64
+_rebuilt = OrderedDict()  # (фабрика, ключ) -> объект, собранный в этом процессе при распаковке
+_rebuilt_lock = threading.Lock()
+
+
+def _rebuild(factory, args, key):
+    """
+    Распаковка скомпилированного объекта: factory(*args) — конструктор или CompiledDFA._from_flat.
+    Исполнитель процессов передаёт объект заново с каждой задачей, поэтому собранные
+    объекты хранятся в LRU-кеше на REBUILT_CACHE_SIZE записей. key готовит отправитель
+    (_rebuild_key): шаблон и флаги, Budget — кортежем пределов (сам он сравнивается
+    по identity), для DFA без шаблона — хеш плоской формы. key=None (объект с
+    профилем) — кеш не используется, у каждого распакованного объекта свои счётчики.
+    """
+    if key is None:
+        return factory(*args)
+    key = (factory, key)
+    with _rebuilt_lock:
+        compiled = _rebuilt.get(key)
+        if compiled is not None:
+            _rebuilt.move_to_end(key)
+            return compiled
+    compiled = factory(*args)
+    with _rebuilt_lock:
+        compiled = _rebuilt.setdefault(key, compiled)
+        _rebuilt.move_to_end(key)
+        if len(_rebuilt) > REBUILT_CACHE_SIZE:
+            _rebuilt.popitem(last=False)
+    return compiled
+
+
+def _as_dfa(other):
+    # Принимаем как скомпилированный объект, так и «голый» DFA (например, результат intersect)
+    return other.min_dfa if isinstance(other, CompiledDFA) else other
+
+
+class CompiledGlushkov(_Frozen):
+    """Автомат Глушкова с бит-параллельным сопоставлением (для выражений до 64 позиций)."""
+
+    def __init__(self, pattern, profile=False):
+        self.pattern = pattern
+        self.stats = CompileStats(profiling=profile)
+        with self.stats.stage("parse"):
+            self.tokens = RegexLexer(pattern).lex()
+            self.ast = RegexParser(self.tokens).parse()
+        with self.stats.stage("glushkov"):
+            self.matcher = BitParallelMatcher(self.ast)
+        self.stats.sizes["glushkov"] = {"states": self.matcher.automaton.size,
+                                        "transitions": sum(bin(mask).count("1")
+                                                           for mask in self.matcher.automaton.follow)}
+        self._freeze(pattern, profile)
+
+    def match(self, string):
+        return self.matcher.match(string)
+
+    def search(self, string):
+        return self.matcher.search(string)
+
+    def is_match(self, string) -> bool:
+        return self.matcher.accepts(string)
+
+    def fullmatch_bool(self, string) -> bool:
+        return self.matcher.accepts(string)
+
+
+class CompiledRegex(_Frozen):
+    """
+    Выражение, для которого движок выбран автоматически (см. RegexPlanner).
+    Решение доступно в plan. Для любого движка API одинаковый:
+    - match(string): совпадение со всей строкой
+    - search(string, pos=0): самое левое, затем кратчайшее непустое вхождение
+    - finditer(string): все такие непересекающиеся вхождения
+    Если в выражении есть именованные группы, границы совпадения находит
+    выбранный движок, а группы достраивает НКА только на найденном отрезке —
+    даже если выражение переведено в стандартный re (plan.features["stdlib"]):
+    re распределяет захваты по-своему, и группы зависели бы от того, какой движок выбран.
+    debug=True сверяет каждый результат match/search с НКА и при расхождении
+    поднимает AssertionError.
+    """
+
+    def __init__(self, pattern, profile=False, budget=None, debug=False):
+        self.pattern = pattern
+        self.stats = CompileStats(profiling=profile)
+        with self.stats.stage("parse"):
+            self.tokens = RegexLexer(pattern).lex()
+            self.ast = RegexParser(self.tokens).parse()
+        with self.stats.stage("plan"):
+            self.plan, self.engine = RegexPlanner.plan(self.ast, budget)
+        self.debug = debug
+        self.nfa = None
+        if self.engine is None or debug or self.plan.features["has_groups"]:
+            with self.stats.stage("nfa"):
+                self.nfa = NFAConstructor().build(self.ast)
+        self._freeze(pattern, profile, budget, debug)
+
+    def _result(self, string, start, end):
+        spans = None
+        if self.nfa is not None:
+            # Захваты внутри уже найденного отрезка
+            inner = match_nfa(self.nfa, string[start:end], full=True)
+            if inner is not None and inner.spans:
+                spans = {name: (s + start, e + start) for name, (s, e) in inner.spans.items()}
+        return MatchResult(string, start, end, spans)
+
+    def match(self, string):
+        if self.engine is None:
+            return match_nfa(self.nfa, string, full=True)
+        result = self._result(string, 0, len(string)) if self.engine.accepts(string) else None
+        if self.debug:
+            self._check("match", string, result, match_nfa(self.nfa, string, full=True))
+        return result
+
+    def search(self, string, pos=0):
+        if self.engine is None:
+            return self._search_nfa(string, pos)
+        span = self.engine.find(string, pos)
+        result = None if span is None else self._result(string, *span)
+        if self.debug:
+            self._check("search", string, result, self._search_nfa(string, pos))
+        return result
+
+    def _search_nfa(self, string, pos):
+        for start in range(pos, len(string)):
+            result = match_nfa(self.nfa, string, start=start)
+            if result is not None:
+                return result
+        return None
+
+    def _check(self, kind, string, result, expected):
+        """Сверка с НКА в режиме debug: границы и группы должны совпасть."""
+        got = None if result is None else (result.span(), result.spans or {})
+        want = None if expected is None else (expected.span(), expected.spans or {})
+        if got != want:
+            raise AssertionError(f"{self.plan.engine} engine disagrees with the NFA on "
+                                 f"{kind}({string!r}) for {self.pattern!r}: {got} != {want}")
+
+    def finditer(self, string):
+        pos = 0
+        while True:
+            result = self.search(string, pos)
+            if result is None:
+                return
+            yield result
+            pos = result.end
+
+    def is_match(self, string) -> bool:
+        if self.engine is None:
+            return accepts_nfa(self.nfa, string)
+        return self.engine.accepts(string)
+
+    fullmatch_bool = is_match
+
+
+def compile(pattern: str, profile=False, budget=None, debug=False) -> CompiledRegex:
+    """Компилирует выражение, выбирая движок по результатам анализа дерева."""
+    return CompiledRegex(pattern, profile, budget, debug)
+
+
+def compile_nfa(pattern: str, profile=False) -> CompiledNFA:
+    return CompiledNFA(pattern, profile)
+
+
+def compile_dfa(pattern: str, profile=False, engine="thompson", budget=None) -> CompiledDFA:
+    return CompiledDFA(pattern, profile, engine, budget)
 
 
-def compile_nfa(pattern: str) -> CompiledNFA:
-    return CompiledNFA(pattern)
+def compile_words(words, assume_sorted=False) -> CompiledDFA:
+    """
+    Словарь литералов как один минимальный ДКА (алгоритм Daciuk и др.) — вместо
+    огромной альтернативы w1|w2|... через НКА и метод подмножеств.
+    """
+    return CompiledDFA.from_dfa(build_word_dfa(words, assume_sorted), minimal=True)
 
 
-def compile_dfa(pattern: str) -> CompiledDFA:
-    return CompiledDFA(pattern)
+def compile_glushkov(pattern: str, profile=False) -> CompiledGlushkov:
+    return CompiledGlushkov(pattern, profile)
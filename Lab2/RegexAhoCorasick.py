@@ -0,0 +1,84 @@
+from collections import deque
+from RegexDFA import DFA, DFAState
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо–Корасик для поиска многих ключевых слов за один проход.
+    Бор строится на DFAState, затем переходы goto и суффиксные ссылки fail
+    сворачиваются в полный ДКА: для каждого состояния и каждого символа
+    алфавита слов переход записан явно, так что шаг по тексту — один поиск
+    в словаре без цепочек fail. Символы вне алфавита ведут в корень.
+    - keywords: слова; номер слова в списке — его id
+    - dfa: полученный ДКА; принимающие состояния — те, где заканчивается слово
+    - outputs: {принимающее состояние: ((id, длина), ...)} — от самого длинного
+      слова (оно начинается левее всех) к самому короткому
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        root = DFAState("ac0", frozenset())
+        root.is_end = False
+        self.dfa = DFA()
+        self.dfa.start = root
+        self.dfa.states.append(root)
+        self.outputs = {}
+        alphabet = set()
+        for kid, word in enumerate(self.keywords):
+            if not word:
+                raise ValueError("Aho–Corasick keywords must be non-empty")
+            alphabet.update(word)
+            self.outputs.setdefault(self._insert(word), []).append((kid, len(word)))
+        self.alphabet = frozenset(alphabet)
+        self._compile()
+
+    def _insert(self, word):
+        node = self.dfa.start
+        for ch in word:
+            child = node.transitions.get(ch)
+            if child is None:
+                child = DFAState(f"ac{len(self.dfa.states)}", frozenset())
+                child.is_end = False
+                node.transitions[ch] = child
+                self.dfa.states.append(child)
+            node = child
+        node.is_end = True
+        return node
+
+    def _compile(self):
+        # Обход в ширину: к моменту обработки состояния его суффиксная ссылка
+        # (она мельче) уже имеет полный набор переходов
+        root = self.dfa.start
+        fail = {}
+        queue = deque()
+        for child in root.transitions.values():
+            fail[child] = root
+            queue.append(child)
+        for ch in self.alphabet:
+            root.transitions.setdefault(ch, root)
+        while queue:
+            state = queue.popleft()
+            link = fail[state]
+            if link.is_end:
+                state.is_end = True
+                self.outputs.setdefault(state, []).extend(self.outputs[link])
+            for ch in self.alphabet:
+                child = state.transitions.get(ch)  # пока здесь только переходы бора
+                if child is not None:
+                    fail[child] = link.transitions[ch]
+                    queue.append(child)
+                else:
+                    state.transitions[ch] = link.transitions[ch]
+        self.outputs = {state: tuple(sorted(out, key=lambda item: (-item[1], item[0])))
+                        for state, out in self.outputs.items()}
+
+    def finditer(self, text, pos=0):
+        """Все вхождения всех слов (в том числе перекрывающиеся): (id, начало, конец) по возрастанию конца."""
+        root = self.dfa.start
+        outputs = self.outputs
+        state = root
+        for end, ch in enumerate(text[pos:] if pos else text, pos + 1):
+            state = state.transitions.get(ch, root)
+            if state.is_end:
+                for kid, length in outputs[state]:
+                    yield kid, end - length, end
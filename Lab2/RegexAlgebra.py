@@ -0,0 +1,209 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from RegexDFA import DFA, DFAState, minimize_dfa, complement_dfa, intersect_dfa, union_dfa, difference_dfa
+
+# Канонический ДКА в «плоском» виде — кортежи, которые хешируются и дёшево передаются
+# в другие процессы (pickle графа DFAState упирается в глубину рекурсии):
+#   (accepting, transitions), состояние 0 — стартовое,
+#   accepting[i] — принимает ли состояние i, transitions[i] — ((символ, цель), ...) по возрастанию символа
+EMPTY_FLAT = ((False,), ((),))
+
+
+def _trim(dfa):
+    """Состояния, из которых достижимо принимающее (остальные — та же ловушка, что и отсутствующий переход)."""
+    reverse = {}
+    reachable = {dfa.start}
+    queue = deque([dfa.start])
+    while queue:
+        state = queue.popleft()
+        for target in state.transitions.values():
+            reverse.setdefault(target, []).append(state)
+            if target not in reachable:
+                reachable.add(target)
+                queue.append(target)
+    live = {state for state in reachable if state.is_end}
+    queue = deque(live)
+    while queue:
+        for source in reverse.get(queue.popleft(), ()):
+            if source not in live:
+                live.add(source)
+                queue.append(source)
+    return live
+
+
+def _restrict(dfa, live) -> DFA:
+    """Копия ДКА только из состояний live; переходы в остальные отбрасываются."""
+    copies = {state: DFAState(state.name, frozenset()) for state in live}
+    for state, copy in copies.items():
+        copy.is_end = state.is_end
+        copy.transitions = {symbol: copies[target] for symbol, target in state.transitions.items()
+                            if target in copies}
+    restricted = DFA()
+    restricted.states = list(copies.values())
+    restricted.start = copies[dfa.start]
+    return restricted
+
+
+def to_flat(dfa):
+    """
+    Каноническая форма языка: удаление бесполезных состояний, минимизация и
+    нумерация обходом в ширину с символами по возрастанию. У равных языков
+    формы совпадают, поэтому форма служит ключом кеша. Порядок важен: после
+    удаления отсутствующий переход — единственный способ отвергнуть строку, и
+    минимизация склеивает состояния, различавшиеся только тупиковыми ветками.
+    """
+    live = _trim(dfa)
+    if dfa.start not in live:
+        return EMPTY_FLAT
+    dfa = minimize_dfa(_restrict(dfa, live))
+    number = {dfa.start: 0}
+    order = [dfa.start]
+    transitions = []
+    for state in order:  # order растёт по ходу обхода
+        row = []
+        for symbol in sorted(state.transitions):
+            target = state.transitions[symbol]
+            if target not in number:
+                number[target] = len(order)
+                order.append(target)
+            row.append((symbol, number[target]))
+        transitions.append(tuple(row))
+    return tuple(state.is_end for state in order), tuple(transitions)
+
+
+def from_flat(flat) -> DFA:
+    accepting, transitions = flat
+    dfa = DFA()
+    dfa.states = [DFAState(f"c{i}", frozenset()) for i in range(len(accepting))]
+    for state, is_end, row in zip(dfa.states, accepting, transitions):
+        state.is_end = is_end
+        state.transitions = {symbol: dfa.states[target] for symbol, target in row}
+    dfa.start = dfa.states[0]
+    return dfa
+
+
+_OPERATIONS = {
+    '&': intersect_dfa,
+    '|': union_dfa,
+    '-': difference_dfa,
+}
+
+
+def apply_flat(op, *flats):
+    """Одна операция над каноническими формами; результат — снова каноническая форма (минимальный ДКА)."""
+    if op == '~':
+        return to_flat(complement_dfa(from_flat(flats[0])))
+    return to_flat(_OPERATIONS[op](from_flat(flats[0]), from_flat(flats[1])))
+
+
+class SetExpr:
+    """
+    Узел выражения над языками: лист (ДКА) или операция '&', '|', '-', '~'.
+    Выражения строятся операторами и вычисляются SetAlgebra.evaluate.
+    Дополнение — до печатных ASCII и символов самого выражения, как у complement_dfa.
+    """
+
+    def __init__(self, op, args=(), flat=None):
+        self.op = op
+        self.args = tuple(args)
+        self.flat = flat  # для листьев — каноническая форма
+
+    def __and__(self, other):
+        return SetExpr('&', (self, other))
+
+    def __or__(self, other):
+        return SetExpr('|', (self, other))
+
+    def __sub__(self, other):
+        return SetExpr('-', (self, other))
+
+    def __invert__(self):
+        return SetExpr('~', (self,))
+
+
+class SetAlgebra:
+    """
+    Вычислитель выражений над языками с общим кешем.
+    - forms: каноническая форма -> номер языка; листья и промежуточные результаты
+      с одинаковым языком получают один номер, сколько бы раз и как бы они ни
+      были записаны
+    - products: (операция, номера аргументов) -> номер результата; '&' и '|'
+      коммутативны, поэтому их аргументы упорядочиваются
+    Каждый шаг минимизирует результат. Независимые операции одного уровня
+    DAG вычисляются в пуле из processes процессов (None — в текущем процессе).
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes
+        self.forms = {}
+        self.flats = []
+        self.products = {}
+
+    def _intern(self, flat):
+        number = self.forms.get(flat)
+        if number is None:
+            number = self.forms[flat] = len(self.flats)
+            self.flats.append(flat)
+        return number
+
+    def leaf(self, value) -> SetExpr:
+        """Лист из скомпилированного ДКА (берётся min_dfa) или DFA."""
+        dfa = value.min_dfa if hasattr(value, 'min_dfa') else value
+        return SetExpr('leaf', flat=to_flat(dfa))
+
+    def _key(self, op, numbers):
+        if op in ('&', '|'):
+            numbers = tuple(sorted(numbers))
+        return (op,) + tuple(numbers)
+
+    def evaluate(self, expr: SetExpr) -> DFA:
+        """Минимальный ДКА языка выражения."""
+        return from_flat(self.flats[self.language(expr)])
+
+    def language(self, expr: SetExpr) -> int:
+        """Номер языка выражения в кеше forms."""
+        numbers = {}  # id(узла) -> номер языка
+        pending = self._nodes(expr, numbers)
+        pool = ProcessPoolExecutor(self.processes) if self.processes and self.processes > 1 else None
+        try:
+            while pending:
+                # Готовы все узлы, чьи аргументы уже посчитаны
+                ready = [node for node in pending if all(id(arg) in numbers for arg in node.args)]
+                pending = [node for node in pending if not all(id(arg) in numbers for arg in node.args)]
+                jobs = {}
+                for node in ready:
+                    key = self._key(node.op, [numbers[id(arg)] for arg in node.args])
+                    if key in self.products:
+                        numbers[id(node)] = self.products[key]
+                    else:
+                        jobs.setdefault(key, []).append(node)
+                keys = list(jobs)
+                args = [[self.flats[n] for n in key[1:]] for key in keys]
+                if pool is not None and len(keys) > 1:
+                    futures = [pool.submit(apply_flat, key[0], *a) for key, a in zip(keys, args)]
+                    results = [future.result() for future in futures]
+                else:
+                    results = [apply_flat(key[0], *a) for key, a in zip(keys, args)]
+                for key, flat in zip(keys, results):
+                    number = self.products[key] = self._intern(flat)
+                    for node in jobs[key]:
+                        numbers[id(node)] = number
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return numbers[id(expr)]
+
+    def _nodes(self, expr, numbers):
+        """Внутренние узлы DAG (каждый один раз); листья сразу получают номера."""
+        order, seen, stack = [], set(), [expr]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            if node.op == 'leaf':
+                numbers[id(node)] = self._intern(node.flat)
+            else:
+                order.append(node)
+                stack.extend(node.args)
+        return order
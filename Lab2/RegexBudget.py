@@ -0,0 +1,73 @@
+import sys
+import time
+
+STATE_BYTES = 400  # примерный размер DFAState вместе со словарями переходов и атрибутов
+
+
+class BudgetExceeded(Exception):
+    """Построение автомата остановлено: исчерпан бюджет по состояниям, памяти или времени."""
+
+    def __init__(self, stage, resource, limit, used):
+        self.stage = stage          # этап: "dfa", "minimize", "product", ...
+        self.resource = resource    # "states" | "memory" | "seconds"
+        self.limit = limit
+        self.used = used
+        super().__init__(f"{stage}: {resource} budget exceeded ({used} > {limit})")
+
+
+class BudgetFallbackWarning(RuntimeWarning):
+    """Компиляция упёрлась в бюджет и переключилась на более медленный, но безопасный путь."""
+
+
+class Budget:
+    """
+    Ограничения на построение автоматов (None — без ограничения):
+    - max_states: число создаваемых состояний на этапе
+    - max_memory: оценка занимаемой памяти на этапе, в байтах
+    - max_seconds: время этапа
+    Каждый этап (метод подмножеств, минимизация, произведение) получает свой счётчик.
+    """
+
+    def __init__(self, max_states=None, max_memory=None, max_seconds=None):
+        self.max_states = max_states
+        self.max_memory = max_memory
+        self.max_seconds = max_seconds
+
+    def meter(self, stage):
+        return BudgetMeter(self, stage)
+
+    def __repr__(self):
+        return f"Budget(max_states={self.max_states}, max_memory={self.max_memory}, max_seconds={self.max_seconds})"
+
+
+class BudgetMeter:
+    """Счётчик расхода бюджета одного этапа."""
+
+    def __init__(self, budget, stage):
+        self.budget = budget
+        self.stage = stage
+        self.started = time.perf_counter()
+        self.states = 0
+        self.memory = 0
+
+    def add_state(self, key=None):
+        """Учитывает новое состояние; key — его ключ (множество состояний НКА и т.п.) для оценки памяти."""
+        self.states += 1
+        self.memory += STATE_BYTES + (sys.getsizeof(key) if key is not None else 0)
+        budget = self.budget
+        if budget.max_states is not None and self.states > budget.max_states:
+            raise BudgetExceeded(self.stage, "states", budget.max_states, self.states)
+        if budget.max_memory is not None and self.memory > budget.max_memory:
+            raise BudgetExceeded(self.stage, "memory", budget.max_memory, self.memory)
+        self.check_time()
+
+    def check_time(self):
+        if self.budget.max_seconds is not None:
+            elapsed = time.perf_counter() - self.started
+            if elapsed > self.budget.max_seconds:
+                raise BudgetExceeded(self.stage, "seconds", self.budget.max_seconds, round(elapsed, 6))
+
+
+def meter_for(budget, stage):
+    """Счётчик этапа или None, если бюджет не задан."""
+    return budget.meter(stage) if budget is not None else None
@@ -0,0 +1,109 @@
+from RegexMatch import MatchResult, leftmost_shortest, iter_spans
+
+BYTES_TYPES = (bytes, bytearray, memoryview)
+DEAD = -1  # нет перехода
+
+
+def as_byte_view(data):
+    """Одномерное представление входа из целых 0..255 без копирования."""
+    if isinstance(data, memoryview):
+        if data.format != 'B' or data.ndim != 1:
+            return data.cast('B')
+        return data
+    if isinstance(data, (bytes, bytearray)):
+        return data
+    raise TypeError(f"expected bytes-like object, got {type(data).__name__}")
+
+
+class ByteDFA:
+    """
+    ДКА над байтами UTF-8: переход по символу из нескольких байт разворачивается
+    в цепочку промежуточных состояний (общие префиксы кодировок — общие состояния).
+    Таблица плотная: rows[s] — список из 256 целевых состояний (DEAD — нет перехода),
+    accepting[s] — принимает ли состояние s. Промежуточные состояния не принимающие,
+    поэтому совпадения всегда состоят из целых символов.
+    - start: номер стартового состояния
+    """
+
+    def __init__(self, rows, accepting, start=0):
+        self.rows = rows
+        self.accepting = accepting
+        self.start = start
+
+    @classmethod
+    def from_dfa(cls, dfa):
+        index = {dfa.start: 0}
+        order = [dfa.start]
+        for state in dfa.states:
+            if state not in index:
+                index[state] = len(order)
+                order.append(state)
+        rows = [[DEAD] * 256 for _ in order]
+        accepting = [state.is_end for state in order]
+
+        for state in order:
+            for symbol, target in state.transitions.items():
+                encoded = symbol.encode('utf-8')
+                current = index[state]
+                for byte in encoded[:-1]:
+                    nxt = rows[current][byte]
+                    if nxt == DEAD:
+                        nxt = len(rows)
+                        rows.append([DEAD] * 256)
+                        accepting.append(False)
+                        rows[current][byte] = nxt
+                    current = nxt
+                rows[current][encoded[-1]] = index[target]
+        return cls(rows, accepting)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def accepts(self, data) -> bool:
+        view = as_byte_view(data)
+        rows = self.rows
+        state = self.start
+        for byte in view:
+            state = rows[state][byte]
+            if state == DEAD:
+                return False
+        return self.accepting[state]
+
+    def match(self, data):
+        return MatchResult(data, 0, len(as_byte_view(data))) if self.accepts(data) else None
+
+    def _shortest_end(self, view, start):
+        rows, accepting = self.rows, self.accepting
+        state = self.start
+        for pos in range(start, len(view)):
+            state = rows[state][view[pos]]
+            if state == DEAD:
+                return -1
+            if accepting[state]:
+                return pos + 1
+        return -1
+
+    def find(self, data, pos=0):
+        """Самое левое, а среди них кратчайшее непустое вхождение: (начало, конец) или None."""
+        return leftmost_shortest(self._shortest_end, as_byte_view(data), pos)
+
+    def search(self, data, pos=0):
+        span = self.find(data, pos)
+        return MatchResult(data, *span) if span is not None else None
+
+    def finditer(self, data):
+        """Все непересекающиеся вхождения; границы — смещения в байтах."""
+        for span in iter_spans(self.find, as_byte_view(data)):
+            yield MatchResult(data, *span)
+
+    def complement(self) -> 'ByteDFA':
+        """
+        Дополнение до всех последовательностей байт (добавляется тупиковое состояние).
+        Принимает в том числе и некорректный UTF-8 — в отличие от complement_dfa,
+        который дополняет только до строк над алфавитом выражения.
+        """
+        sink = len(self.rows)
+        rows = [[sink if target == DEAD else target for target in row] for row in self.rows]
+        rows.append([sink] * 256)
+        accepting = [not flag for flag in self.accepting] + [True]
+        return ByteDFA(rows, accepting, self.start)
@@ -0,0 +1,151 @@
+import re
+from collections import deque
+
+
+def _number_states(dfa):
+    """Нумерует состояния обходом в ширину от начального (начальное — 0)."""
+    order = [dfa.start]
+    numbers = {dfa.start: 0}
+    queue = deque([dfa.start])
+    while queue:
+        state = queue.popleft()
+        for symbol in sorted(state.transitions):
+            target = state.transitions[symbol]
+            if target not in numbers:
+                numbers[target] = len(order)
+                order.append(target)
+                queue.append(target)
+    return order, numbers
+
+
+def _loop_symbols(state):
+    """Символы петли ускоренного состояния (см. accelerate_dfa) или пустая строка."""
+    if getattr(state, 'skip', None) is None:
+        return ''
+    return ''.join(sorted(symbol for symbol, target in state.transitions.items() if target is state))
+
+
+def _table_lines(order, numbers):
+    """
+    Таблица переходов: по словарю на состояние, символ -> словарь следующего
+    состояния, так что шаг автомата — один dict.get без номеров и ветвлений.
+    Символы с общей целью записываются одним dict.fromkeys.
+    """
+    lines = [f"ROWS = [{{}} for _ in range({len(order)})]"]
+    for number, state in enumerate(order):
+        by_target = {}
+        for symbol, target in state.transitions.items():
+            by_target.setdefault(numbers[target], []).append(symbol)
+        for target, symbols in sorted(by_target.items()):
+            symbols = ''.join(sorted(symbols))
+            lines.append(f"ROWS[{number}].update(dict.fromkeys({symbols!r}, ROWS[{target}]))")
+        if state.is_end:
+            lines.append(f"ROWS[{number}][None] = True")
+        loop = _loop_symbols(state)
+        if loop:
+            lines.append(f"ROWS[{number}][0] = re.compile({'[' + re.escape(loop) + ']*'!r}).match")
+    lines.append("START = ROWS[0]")
+    return lines
+
+
+_PLAIN = """
+
+def match(string):
+    row = START
+    for c in string:
+        row = row.get(c)
+        if row is None:
+            return False
+    return None in row
+
+
+def _shortest_end(string, start, n):
+    row = START
+    for i in range(start, n):
+        row = row.get(string[i])
+        if row is None:
+            return -1
+        if None in row:
+            return i + 1
+    return -1
+"""
+
+# Как _accepts_accelerated и _shortest_match_accelerated в RegexDFA: серия петли
+# длиннее одного символа проходится одним вызовом re
+_ACCELERATED = """
+
+def match(string):
+    row = START
+    n = len(string)
+    pos = 0
+    while True:
+        for pos in range(pos, n):
+            target = row.get(string[pos])
+            if target is None:
+                return False
+            if target is row and 0 in row and pos + 1 < n and row.get(string[pos + 1]) is row:
+                pos = row[0](string, pos + 2).end()
+                break
+            row = target
+        else:
+            return None in row
+
+
+def _shortest_end(string, start, n):
+    row = START
+    while True:
+        for i in range(start, n):
+            target = row.get(string[i])
+            if target is None:
+                return -1
+            if None in target:
+                return i + 1
+            if target is row and 0 in row and i + 1 < n and row.get(string[i + 1]) is row:
+                start = row[0](string, i + 2).end()
+                break
+            row = target
+        else:
+            return -1
+"""
+
+_SEARCH = """
+
+def search(string):
+    n = len(string)
+    for start in range(n):
+        if string[start] in START:
+            end = _shortest_end(string, start, n)
+            if end != -1:
+                return start, end
+    return None
+"""
+
+
+def dfa_to_python(dfa, pattern=None) -> str:
+    """
+    Генерирует исходный код самостоятельного Python-модуля, реализующего ДКА
+    таблицей словарей (по словарю на состояние). Если ДКА ускорен (accelerate_dfa),
+    серии петель проходятся скомпилированным re, как в accepts_dfa.
+    Модуль не зависит от библиотеки и экспортирует:
+    - match(string) -> bool: принимает ли ДКА строку целиком
+    - search(string) -> (start, end) | None: самое левое кратчайшее непустое вхождение
+    """
+    order, numbers = _number_states(dfa)
+    accelerated = any(_loop_symbols(state) for state in order)
+
+    lines = ['"""']
+    lines.append("Сгенерированный ДКА" + (" для регулярного выражения ниже" if pattern is not None else "") + ".")
+    lines.append('Не редактируйте вручную."""')
+    if pattern is not None:
+        # В комментарии, а не в строке документации: repr не содержит переводов строк,
+        # а кавычки и обратные косые черты шаблона не могут закрыть строку
+        lines.append(f"# {pattern!r}")
+    if accelerated:
+        lines.append("import re")
+    lines.append("")
+    lines.append("# Строка на состояние: символ -> строка следующего состояния. Служебные ключи")
+    lines.append("# (символы входа — всегда str): None — состояние принимающее, 0 — re.match серии петли")
+    lines.append("")
+    lines += _table_lines(order, numbers)
+    lines.append((_ACCELERATED if accelerated else _PLAIN) + _SEARCH)
+    return "\n".join(lines)
@@ -0,0 +1,175 @@
+from abc import ABC, abstractmethod
+from RegexMatch import MatchResult, leftmost_shortest, iter_spans
+
+
+class LanguageExpr(ABC):
+    """
+    Выражение над языками: A & ~B | C, где A, B, C — ДКА (или скомпилированные
+    выражения). Произведение автоматов не строится: LockStepMatcher ведёт
+    все компоненты одновременно по входу, а формулу вычисляет по флагам
+    «компонент принял» в конце. Стоимость сопоставления линейна по числу
+    компонент, сколько бы состояний ни было у произведения.
+    Дополнение берётся относительно всех строк (без фиксированного алфавита),
+    в отличие от complement_dfa, дополняющего до печатных ASCII.
+    """
+
+    def __and__(self, other):
+        return Combination('&', (self, as_expr(other)))
+
+    def __rand__(self, other):
+        return Combination('&', (as_expr(other), self))
+
+    def __or__(self, other):
+        return Combination('|', (self, as_expr(other)))
+
+    def __ror__(self, other):
+        return Combination('|', (as_expr(other), self))
+
+    def __invert__(self):
+        return Combination('~', (self,))
+
+    @abstractmethod
+    def leaves(self):
+        """ДКА-компоненты выражения слева направо (с повторами)."""
+
+    @abstractmethod
+    def evaluator(self, index):
+        """Функция flags -> bool; index — {id(ДКА): номер компоненты}."""
+
+    @property
+    def matcher(self) -> 'LockStepMatcher':
+        # Выражения неизменяемы — сопоставитель строится один раз
+        matcher = self.__dict__.get('_matcher')
+        if matcher is None:
+            matcher = self._matcher = LockStepMatcher(self)
+        return matcher
+
+    def accepts(self, string) -> bool:
+        return self.matcher.accepts(string)
+
+    def match(self, string):
+        return MatchResult(string, 0, len(string)) if self.accepts(string) else None
+
+    def find(self, string, pos=0):
+        return self.matcher.find(string, pos)
+
+    def search(self, string, pos=0):
+        span = self.find(string, pos)
+        return MatchResult(string, *span) if span is not None else None
+
+    def finditer(self, string):
+        for span in iter_spans(self.find, string):
+            yield MatchResult(string, *span)
+
+
+class Atom(LanguageExpr):
+    """Компонента-ДКА."""
+
+    def __init__(self, dfa, label=None):
+        self.dfa = dfa
+        self.label = label
+
+    def leaves(self):
+        return [self.dfa]
+
+    def evaluator(self, index):
+        i = index[id(self.dfa)]
+        return lambda flags: flags[i]
+
+    def __str__(self):
+        return self.label or f"<dfa {len(self.dfa.states)} states>"
+
+
+class Combination(LanguageExpr):
+    """Операция над выражениями: '&', '|' или '~'."""
+
+    def __init__(self, op, args):
+        self.op = op
+        self.args = args
+
+    def leaves(self):
+        return [dfa for arg in self.args for dfa in arg.leaves()]
+
+    def evaluator(self, index):
+        parts = [arg.evaluator(index) for arg in self.args]
+        if self.op == '~':
+            inner = parts[0]
+            return lambda flags: not inner(flags)
+        if self.op == '&':
+            return lambda flags: all(part(flags) for part in parts)
+        return lambda flags: any(part(flags) for part in parts)
+
+    def __str__(self):
+        if self.op == '~':
+            return f"~{_paren(self.args[0])}"
+        return f" {self.op} ".join(_paren(arg) for arg in self.args)
+
+
+def _paren(expr):
+    return f"({expr})" if isinstance(expr, Combination) and expr.op != '~' else str(expr)
+
+
+def as_expr(value) -> LanguageExpr:
+    """Выражение из LanguageExpr, скомпилированного ДКА (есть min_dfa) или DFA."""
+    if isinstance(value, LanguageExpr):
+        return value
+    if hasattr(value, 'min_dfa'):
+        return Atom(value.min_dfa, getattr(value, 'pattern', None))
+    if hasattr(value, 'start') and hasattr(value, 'states'):
+        return Atom(value)
+    raise TypeError(f"Cannot combine {type(value).__name__} with a language expression")
+
+
+class LockStepMatcher:
+    """
+    Одновременный прогон компонент выражения по входу.
+    states[i] — текущее состояние i-й компоненты, None — компонента «умерла»
+    (дальше не примет ничего). Когда умерли все, значение формулы больше
+    не меняется и вход можно не дочитывать.
+    """
+
+    def __init__(self, expr: LanguageExpr):
+        self.dfas = []
+        index = {}
+        for dfa in expr.leaves():
+            if id(dfa) not in index:  # один и тот же ДКА ведётся один раз
+                index[id(dfa)] = len(self.dfas)
+                self.dfas.append(dfa)
+        self.evaluate = expr.evaluator(index)
+        self.dead_value = self.evaluate([False] * len(self.dfas))
+
+    def _flags(self, states):
+        return [state is not None and state.is_end for state in states]
+
+    def accepts(self, string) -> bool:
+        states = [dfa.start for dfa in self.dfas]
+        alive = len(states)
+        for char in string:
+            for i, state in enumerate(states):
+                if state is not None:
+                    state = states[i] = state.transitions.get(char)
+                    if state is None:
+                        alive -= 1
+            if not alive:
+                return self.dead_value
+        return self.evaluate(self._flags(states))
+
+    def _shortest_end(self, string, start):
+        states = [dfa.start for dfa in self.dfas]
+        alive = len(states)
+        for pos in range(start, len(string)):
+            char = string[pos]
+            for i, state in enumerate(states):
+                if state is not None:
+                    state = states[i] = state.transitions.get(char)
+                    if state is None:
+                        alive -= 1
+            if not alive:
+                return pos + 1 if self.dead_value else -1
+            if self.evaluate(self._flags(states)):
+                return pos + 1
+        return -1
+
+    def find(self, string, pos=0):
+        """Самое левое, затем кратчайшее непустое вхождение: (начало, конец) или None."""
+        return leftmost_shortest(self._shortest_end, string, pos)
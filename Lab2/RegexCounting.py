@@ -0,0 +1,122 @@
+import random
+import threading
+
+
+class PathCounter:
+    """
+    Подсчёт строк, принимаемых ДКА, по длинам.
+    M[i][j] — число символов, ведущих из состояния i в j; тогда число строк
+    длины n равно (e_start · M^n · accept). Степень считается повторным
+    возведением в квадрат — O(log n) матричных умножений. Элементы — целые
+    Python (NumPy dtype=object), поэтому переполнения нет при любом n.
+    Считаются строки над символами самого ДКА (его переходами).
+
+    Для выборки и перечисления строится таблица ways[k][i] — число принимаемых
+    продолжений длины k из состояния i; она растёт по мере надобности (под замком).
+    """
+
+    def __init__(self, dfa):
+        import numpy as np  # импортируется только при первом построении счётчика
+        self.np = np
+        self.states = [dfa.start] + [state for state in dfa.states if state is not dfa.start]
+        index = {state: i for i, state in enumerate(self.states)}
+        size = len(self.states)
+        self.matrix = np.zeros((size, size), dtype=object)
+        for state in self.states:
+            for target in state.transitions.values():
+                self.matrix[index[state], index[target]] += 1
+        self.accept = np.array([1 if state.is_end else 0 for state in self.states], dtype=object)
+        # Переходы в порядке символов: от него зависят shortlex-порядок и воспроизводимость выборки
+        self.edges = [sorted((symbol, index[target]) for symbol, target in state.transitions.items())
+                      for state in self.states]
+        self.ways = [[1 if state.is_end else 0 for state in self.states]]
+        self._lock = threading.Lock()
+
+    def _ways(self, length):
+        """Таблица ways, достроенная до длины length включительно."""
+        if len(self.ways) <= length:
+            with self._lock:
+                ways = self.ways
+                while len(ways) <= length:
+                    previous = ways[-1]
+                    ways.append([sum(previous[target] for _, target in edges) for edges in self.edges])
+        return self.ways
+
+    def _power_row(self, matrix, n):
+        """Первая строка matrix^n (строка стартового состояния)."""
+        np = self.np
+        row = np.zeros(len(matrix), dtype=object)
+        row[0] = 1
+        square = matrix
+        while n:
+            if n & 1:
+                row = row.dot(square)
+            n >>= 1
+            if n:
+                square = square.dot(square)
+        return row
+
+    def count(self, n: int) -> int:
+        """Число принимаемых строк длины ровно n."""
+        if n < 0:
+            raise ValueError(f"Length must be non-negative: {n}")
+        return int(self._power_row(self.matrix, n).dot(self.accept))
+
+    def count_upto(self, n: int) -> int:
+        """
+        Число принимаемых строк длины не больше n.
+        Матрица дополняется накопительным состоянием: [[M, accept], [0, 1]];
+        правый столбец её (n+1)-й степени — сумма M^i · accept по i = 0..n.
+        """
+        if n < 0:
+            raise ValueError(f"Length must be non-negative: {n}")
+        np = self.np
+        size = len(self.matrix)
+        extended = np.zeros((size + 1, size + 1), dtype=object)
+        extended[:size, :size] = self.matrix
+        extended[:size, size] = self.accept
+        extended[size, size] = 1
+        return int(self._power_row(extended, n + 1)[size])
+
+    def sample(self, length: int, rng=None) -> str:
+        """
+        Равновероятно выбранная принимаемая строка длины length.
+        На каждом шаге переход берётся с весом, равным числу принимаемых
+        продолжений из его цели, поэтому все строки языка этой длины равновероятны.
+        rng — random.Random (для воспроизводимости), по умолчанию модуль random.
+        """
+        if length < 0:
+            raise ValueError(f"Length must be non-negative: {length}")
+        rng = rng or random
+        ways = self._ways(length)
+        if ways[length][0] == 0:
+            raise ValueError(f"No accepted strings of length {length}")
+        chars = []
+        state = 0
+        for remaining in range(length - 1, -1, -1):
+            pick = rng.randrange(ways[remaining + 1][state])
+            for symbol, target in self.edges[state]:
+                pick -= ways[remaining][target]
+                if pick < 0:
+                    break
+            chars.append(symbol)
+            state = target
+        return ''.join(chars)
+
+    def enumerate(self, max_len: int):
+        """Принимаемые строки длины не больше max_len в shortlex-порядке (лениво)."""
+        ways = self._ways(max_len)
+        for length in range(max_len + 1):
+            if ways[length][0]:
+                yield from self._words(0, length, ways, [])
+
+    def _words(self, state, remaining, ways, prefix):
+        if remaining == 0:
+            yield ''.join(prefix)
+            return
+        for symbol, target in self.edges[state]:
+            # Ветки без принимаемых продолжений нужной длины не обходятся
+            if ways[remaining - 1][target]:
+                prefix.append(symbol)
+                yield from self._words(target, remaining - 1, ways, prefix)
+                prefix.pop()
@@ -1,22 +1,14 @@
+import re
 from collections import deque
+from functools import partial
+from itertools import islice
 import graphviz
+from RegexMatch import MatchResult, leftmost_shortest
+from RegexBudget import meter_for
+from RegexNFA import NFATemplate, nfa_template
+from RegexNode import RegexOp, RegexNode
 
-
-class MatchResult:
-    def __init__(self, start, end, full_match, groups):
-        self.start = start  # Начальная позиция совпадения
-        self.end = end  # Конечная позиция совпадения
-        self.full_match = full_match  # Совпавшая подстрока
-        self.groups = groups  # Словарь именованных групп
-
-    def __getitem__(self, key):
-        return self.groups.get(key, None)  # Позволяет доступ к группам по имени через []
-
-    def __iter__(self):
-        return iter(self.groups.items())  # Позволяет итерироваться по группам
-
-    def __str__(self):
-        return f"Result(start: {self.start}, end: {self.end}, fill_match: {self.full_match}, groups: {self.groups})"
+ACCEL_MAX_EXITS = 3  # состояние ускоряется, если из него ведёт не больше стольких «выходов»
 
 
 class DFAState:
@@ -28,6 +20,7 @@ class DFAState:
     - transitions: словарь {символ: целевое состояние DFA}
     - is_end: флаг, указывающий, является ли состояние завершающим
     - groups: дополнительные данные для поддержки захватов (опционально)
+    - skip: для ускоренных состояний — match скомпилированного «[петли]*» (см. accelerate_dfa)
     """
 
     def __init__(self, name, nfa_states):
@@ -36,6 +29,7 @@ class DFAState:
         self.transitions = {}
         self.is_end = any(state.is_end for state in nfa_states)
         self.groups = {}
+        self.skip = None
 
 
 # Класс для ДКА
@@ -46,11 +40,13 @@ class DFA:
     - start: стартовое состояние
     - states: список всех состояний автомата
     - finals: множество завершающих состояний
+    - accelerated: есть ли состояния с skip (тогда сопоставление идёт ускоренным циклом)
     """
 
     def __init__(self):
         self.start = None
         self.states = []
+        self.accelerated = False
 
     @property
     def finals(self):
@@ -79,11 +75,13 @@ def move(states, symbol):
     return result  # Возвращаем множество целевых состояний
 
 
-def nfa_to_dfa(nfa):
+def nfa_to_dfa(nfa, budget=None):
     """
     Алгоритм преобразования NFA в DFA по методу подмножеств (subset construction).
     Для каждого множества состояний NFA создаётся уникальное состояние DFA.
+    budget (RegexBudget.Budget) ограничивает построение; при превышении — BudgetExceeded.
     """
+    meter = meter_for(budget, "dfa")
     dfa = DFA()  # Создаем новый ДКА
     state_map = {}  # Словарь для отображения множества состояний NFA в состояние DFA
     queue = deque()  # Очередь для обработки состояний
@@ -110,6 +108,8 @@ def nfa_to_dfa(nfa):
             closure_frozen = frozenset(closure)
 
             if closure_frozen not in state_map:  # Если такого состояния ещё нет
+                if meter is not None:
+                    meter.add_state(closure_frozen)
                 new_state = DFAState(f"q{state_counter}", closure_frozen)
                 state_counter += 1
                 state_map[closure_frozen] = new_state
@@ -121,19 +121,29 @@ def nfa_to_dfa(nfa):
     return dfa
 
 
-def minimize_dfa(dfa):
+def minimize_dfa(dfa, key=None, budget=None):
     """
     Алгоритм минимизации DFA по Хопкрофту.
     Разделяет состояния на классы эквивалентности, объединяет эквивалентные состояния.
+    key(state) задаёт начальное разбиение (по умолчанию — принимающие/непринимающие),
+    например, чтобы не склеивать принимающие состояния разных токенов сканера.
+    budget ограничивает время минимизации.
     """
+    meter = meter_for(budget, "minimize")
     alphabet = set()
     for state in dfa.states:
         alphabet.update(state.transitions.keys())
 
-    final_states = {s for s in dfa.states if s.is_end}
-    non_final_states = set(dfa.states) - final_states
-    partitions = [final_states, non_final_states] if non_final_states else [
-        final_states]
+    if key is None:
+        final_states = {s for s in dfa.states if s.is_end}
+        non_final_states = set(dfa.states) - final_states
+        partitions = [final_states, non_final_states] if non_final_states else [
+            final_states]
+    else:
+        initial = {}
+        for s in dfa.states:
+            initial.setdefault(key(s), set()).add(s)
+        partitions = list(initial.values())
     state_to_partition = {s: i for i, group in enumerate(partitions) for s in
                           group}
 
@@ -142,6 +152,8 @@ def minimize_dfa(dfa):
         changed = False  # Сбрасываем флаг изменения
         new_partitions = []
         for group in partitions:
+            if meter is not None:
+                meter.check_time()
             splits = {}  # Словарь для разделённых групп
             for state in group:
                 sig = tuple(state_to_partition.get(state.transitions.get(sym), -1) for sym in
@@ -203,23 +215,105 @@ def make_dfa_total(dfa, alphabet=None):
     return dfa
 
 
+def copy_dfa(dfa):
+    """Независимая копия DFA (состояния и переходы копируются, nfa_states разделяются)."""
+    clones = {}
+    for state in dfa.states:
+        clone = DFAState(state.name, state.nfa_states)
+        clone.is_end = state.is_end
+        clones[state] = clone
+    for state, clone in clones.items():
+        clone.transitions = {symbol: clones[target] for symbol, target in state.transitions.items()}
+    result = DFA()
+    result.start = clones[dfa.start]
+    result.states = list(clones.values())
+    return result
+
+
+def node_dfa(node, budget=None):
+    """
+    Минимальный ДКА интернированного узла без групп; строится один раз на узел
+    (node.memo). НКА узла собирается из шаблонов детей, полученных из их
+    минимальных ДКА (dfa_template), поэтому общее поддерево семейства выражений
+    детерминизируется и минимизируется однажды, а метод подмножеств для
+    объемлющего выражения идёт по уже детерминированным фрагментам. ДКА
+    поддерева строится, только когда оно встретилось повторно (node.seen):
+    для единственного выражения это была бы лишняя минимизация.
+    Конкатенация разбивается на голову и хвост (_split_concat), чтобы общий
+    префикс выражений тоже был отдельным узлом со своим ДКА.
+    Результат общий для всех выражений с этим узлом: менять его нельзя,
+    владельцу нужна копия (copy_dfa). При BudgetExceeded ничего не кешируется.
+    """
+    node.seen()
+
+    def child(n):
+        # Фрагмент одного символа и так детерминирован
+        if n.op != RegexOp.CHAR and n.seen():
+            return dfa_template(n, budget)
+        return n.memo('nfa_template', nfa_template)
+
+    def build(n):
+        if n.op == RegexOp.CONCAT:
+            n = n.memo('concat_split', _split_concat)
+        template = nfa_template(n, child)
+        return minimize_dfa(nfa_to_dfa(template.instantiate(), budget), budget=budget)
+    return node.memo('min_dfa', build)
+
+
+def _split_concat(node):
+    """
+    CONCAT(c1..cn) -> CONCAT(голова, хвост...): голова — префикс по последний
+    ребёнок, не являющийся символом, включительно (или все, кроме последнего,
+    если последний сам не символ); хвост — оставшиеся символы. Так голов
+    столько же, сколько несимвольных детей, и длинный литерал не порождает
+    квадратичного числа префиксов. Из одних символов — узел без изменений.
+    Результат хранится в memo узла и держит голову живой в таблице интернирования.
+    """
+    children = node.children
+    heavy = [i for i, child in enumerate(children) if child.op != RegexOp.CHAR]
+    if not heavy or len(children) < 2:
+        return node
+    cut = heavy[-1] + 1 if heavy[-1] < len(children) - 1 else len(children) - 1
+    head = children[0] if cut == 1 else RegexNode(RegexOp.CONCAT, children=children[:cut])
+    return RegexNode(RegexOp.CONCAT, children=(head,) + children[cut:])
+
+
+def dfa_template(node, budget=None) -> NFATemplate:
+    """
+    Шаблон фрагмента НКА по минимальному ДКА узла: состояния ДКА и одно новое
+    конечное, куда ведут ε-переходы из принимающих.
+    """
+    def build(n):
+        dfa = node_dfa(n, budget)
+        number = {state: i for i, state in enumerate(dfa.states)}
+        end = len(number)
+        edges = [(number[state], symbol, number[target])
+                 for state in dfa.states for symbol, target in state.transitions.items()]
+        edges += [(number[state], 'ε', end) for state in dfa.states if state.is_end]
+        return NFATemplate(end + 1, tuple(edges), number[dfa.start], end)
+    return node.memo('dfa_template', build)
+
+
 def complement_dfa(dfa):
     """
     Возвращает дополнение DFA. Всё, что не принимается исходным DFA.
+    Исходный DFA не меняется: дополняется его копия.
     """
     # Можно расширить алфавит вручную — например, a-z
     alphabet = set(chr(c) for c in range(32, 127))  # Печатаемые ASCII символы
-    dfa = make_dfa_total(dfa, alphabet)
+    dfa = make_dfa_total(copy_dfa(dfa), alphabet)
     for state in dfa.states:
         state.is_end = not state.is_end
     return dfa
 
 
-def intersect_dfa(dfa1, dfa2):
+def intersect_dfa(dfa1, dfa2, budget=None):
     """
     Пересечение двух DFA через построение автомата-декартова произведения состояний.
     Принимающее состояние — только если оба состояния-пересечения являются принимающими.
+    budget ограничивает число пар состояний, память и время.
     """
+    meter = meter_for(budget, "product")
 
     # Получаем алфавит для каждого DFA
     def get_alphabet(dfa):
@@ -258,6 +352,8 @@ def intersect_dfa(dfa1, dfa2):
             if t1 and t2:
                 next_key = make_key(t1, t2)  # Создаём ключ для пары новых состояний
                 if next_key not in visited:
+                    if meter is not None:
+                        meter.add_state(next_key)
                     new_state = DFAState(name=str(next_key), nfa_states=frozenset())
                     new_state.is_end = t1.is_end and t2.is_end
                     visited[next_key] = new_state
@@ -268,6 +364,64 @@ def intersect_dfa(dfa1, dfa2):
     return new_dfa
 
 
+def _product_dfa(dfa1, dfa2, accept, live, alphabet, budget, stage):
+    """
+    Произведение двух частичных DFA: пара (s1, s2), где None — «умершая» сторона.
+    accept(end1, end2) решает, принимает ли пара; live(s1, s2) — стоит ли строить
+    пару (из остальных принимающее состояние недостижимо).
+    """
+    meter = meter_for(budget, stage)
+    start = (dfa1.start, dfa2.start)
+    names = {start: DFAState("p0", frozenset())}
+    names[start].is_end = accept(dfa1.start.is_end, dfa2.start.is_end)
+    result = DFA()
+    result.start = names[start]
+    result.states.append(result.start)
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        current = names[pair]
+        s1, s2 = pair
+        for symbol in alphabet:
+            t1 = s1.transitions.get(symbol) if s1 is not None else None
+            t2 = s2.transitions.get(symbol) if s2 is not None else None
+            if not live(t1, t2):
+                continue
+            target = (t1, t2)
+            if target not in names:
+                if meter is not None:
+                    meter.add_state(target)
+                state = DFAState(f"p{len(names)}", frozenset())
+                state.is_end = accept(t1 is not None and t1.is_end, t2 is not None and t2.is_end)
+                names[target] = state
+                result.states.append(state)
+                queue.append(target)
+            current.transitions[symbol] = names[target]
+    return result
+
+
+def _alphabet(dfa):
+    symbols = set()
+    for state in dfa.states:
+        symbols.update(state.transitions.keys())
+    return symbols
+
+
+def union_dfa(dfa1, dfa2, budget=None):
+    """Объединение двух DFA: произведение, где пара принимает, если принимает хотя бы одна сторона."""
+    return _product_dfa(dfa1, dfa2, lambda a, b: a or b, lambda s1, s2: s1 is not None or s2 is not None,
+                        _alphabet(dfa1) | _alphabet(dfa2), budget, "product")
+
+
+def difference_dfa(dfa1, dfa2, budget=None):
+    """
+    Разность языков (строки dfa1, которых нет в dfa2) без построения дополнения:
+    пара принимает, если принимает первая сторона и не принимает вторая.
+    """
+    return _product_dfa(dfa1, dfa2, lambda a, b: a and not b, lambda s1, s2: s1 is not None,
+                        _alphabet(dfa1), budget, "product")
+
+
 def dfa_to_regex(dfa):
     def wrap_if_needed(expr):
         """Оборачивает выражение в скобки, если это нужно"""
@@ -340,35 +494,160 @@ def dfa_to_regex(dfa):
     return "|".join(f"{wrap_if_needed(e)}" for e in expressions if e)
 
 
+def accelerate_dfa(dfa, max_exits=ACCEL_MAX_EXITS):
+    """
+    Помечает «ускоряемые» состояния: есть петли, а выходов не больше max_exits,
+    как внутри (a|b|c)…, в xa…y или x… в конце.
+    Серию символов петли такое состояние проходит одним вызовом скомпилированного
+    re «[петли]*» (цикл на C) вместо шага Python на каждый символ; вызов делается,
+    только когда подряд идут хотя бы два символа петли. Переходы ДКА частичные,
+    поэтому ищется конец серии петли, а не следующий выход через str.find:
+    серию обрывает и выход по переходу, и символ без перехода. Короткие серии
+    проходятся обычным шагом, так что лишних вызовов на входе без серий нет.
+    Возвращает число ускоренных состояний; DFA меняется на месте.
+    """
+    accelerated = 0
+    for state in dfa.states:
+        loop = sorted(symbol for symbol, target in state.transitions.items() if target is state)
+        exits = len(state.transitions) - len(loop)
+        if loop and exits <= max_exits:
+            state.skip = re.compile('[' + ''.join(map(re.escape, loop)) + ']*').match
+            accelerated += 1
+    dfa.accelerated = accelerated > 0
+    return accelerated
+
+
 # Функция для сопоставления строки с DFA
-def match_dfa(dfa, string) -> MatchResult or None:
+def accepts_dfa(dfa, string, start=0) -> bool:
+    """
+    Булев быстрый путь: принимает ли DFA строку (начиная с позиции start) целиком.
+    Ничего не выделяет — ни подстрок, ни объектов результата.
+    """
+    if dfa.accelerated:
+        return _accepts_accelerated(dfa, string, start)
+    state = dfa.start
+    for char in (islice(string, start, None) if start else string):
+        state = state.transitions.get(char)
+        if state is None:
+            return False  # Недопустимый переход — не принадлежит языку
+    return state.is_end
+
+
+def _accepts_accelerated(dfa, string, start):
+    state = dfa.start
+    length = len(string)
+    while True:
+        for pos in range(start, length):
+            target = state.transitions.get(string[pos])
+            if target is None:
+                return False
+            if target is state and target.skip is not None and pos + 1 < length \
+                    and target.transitions.get(string[pos + 1]) is target:
+                # Серия петли длиннее одного символа — остаток проходим одним вызовом
+                start = target.skip(string, pos + 2).end()
+                break
+            state = target
+        else:
+            return state.is_end
+
+
+def match_dfa(dfa, string, stats=None) -> MatchResult or None:
     """
     Проверяет, принимает ли минимизированный DFA строку полностью.
     Возвращает MatchResult, если полное совпадение; иначе None.
+    Если передан stats (CompileStats), считает посещения состояний и переходы.
     """
+    if stats is not None:
+        return MatchResult(string, 0, len(string)) if _accepts_dfa_profiled(dfa, string, 0, stats) else None
+    if accepts_dfa(dfa, string):
+        return MatchResult(string, 0, len(string))  # Совпадение на всю строку
+    return None
+
+
+def _accepts_dfa_profiled(dfa, string, start, stats):
+    """Вариант accepts_dfa со сбором профиля — вынесен, чтобы не замедлять обычный путь."""
+    state = dfa.start
+    stats.visit(state)
+    for char in islice(string, start, None):
+        target = state.transitions.get(char)
+        if target is None:
+            return False
+        stats.transition(state, char, target)
+        state = target
+        stats.visit(state)
+    return state.is_end
+
+
+def shortest_match_dfa(dfa, string, start) -> int:
+    """Конец кратчайшего непустого совпадения, начинающегося в start, или -1."""
+    if dfa.accelerated:
+        return _shortest_match_accelerated(dfa, string, start)
     state = dfa.start
-    for i, char in enumerate(string):
-        if char in state.transitions:
-            state = state.transitions[char]
+    for pos in range(start, len(string)):
+        state = state.transitions.get(string[pos])
+        if state is None:
+            return -1
+        if state.is_end:
+            return pos + 1
+    return -1
+
+
+def _shortest_match_accelerated(dfa, string, start):
+    # По петле идём только из непринимающего состояния (в принимающем уже вернулись),
+    # поэтому пропущенные символы не могли дать более короткого совпадения
+    state = dfa.start
+    length = len(string)
+    while True:
+        for pos in range(start, length):
+            target = state.transitions.get(string[pos])
+            if target is None:
+                return -1
+            if target.is_end:
+                return pos + 1
+            if target is state and target.skip is not None and pos + 1 < length \
+                    and target.transitions.get(string[pos + 1]) is target:
+                start = target.skip(string, pos + 2).end()
+                break
+            state = target
         else:
-            return None  # Недопустимый переход — не принадлежит языку
+            return -1
 
-    if state.is_end:
-        return MatchResult(0, len(string), string, {})  # Совпадение на всю строку
-    return None
+
+def find_dfa(dfa, string, pos=0):
+    """
+    Границы самого левого, а среди них кратчайшего непустого вхождения (как у search_nfa)
+    не левее pos, или None. Позиции, с символа которых нельзя выйти из начального
+    состояния, пропускаются сразу.
+    """
+    return leftmost_shortest(partial(shortest_match_dfa, dfa), string, pos, first=dfa.start.transitions)
 
 
 def match_min_dfa(min_dfa, string):
     return match_dfa(min_dfa, string)
 
 
-def search_dfa(dfa, string: str):
-    for start_pos in range(len(string)):
-        sub_str = string[start_pos:]
-        result = match_dfa(dfa, sub_str)
-        if result:
-            return MatchResult(start_pos, start_pos + result.end, result.full_match, result.groups)
-    return None
+def _shortest_match_profiled(dfa, string, start, stats):
+    state = dfa.start
+    stats.visit(state)
+    for pos in range(start, len(string)):
+        target = state.transitions.get(string[pos])
+        if target is None:
+            return -1
+        stats.transition(state, string[pos], target)
+        state = target
+        stats.visit(state)
+        if state.is_end:
+            return pos + 1
+    return -1
+
+
+def search_dfa(dfa, string: str, stats=None):
+    """Самое левое, а среди них кратчайшее непустое вхождение (как search_nfa) или None."""
+    if stats is None:
+        span = find_dfa(dfa, string)
+        return MatchResult(string, *span) if span is not None else None
+    span = leftmost_shortest(partial(_shortest_match_profiled, dfa, stats=stats), string)
+    return MatchResult(string, *span) if span is not None else None
 
 
 def draw_dfa(dfa, filename="dfa"):
@@ -0,0 +1,300 @@
+import threading
+from collections import deque
+from functools import lru_cache
+from RegexNode import RegexOp, RegexNode
+from RegexDFA import DFA, DFAState
+from RegexMatch import MatchResult, leftmost_shortest
+from RegexBudget import meter_for
+
+# Выражения для производных Бржозовского — кортежи, хешируемые и сравнимые структурно:
+#   ('0',)            пустой язык ∅
+#   ('ε',)            пустая строка
+#   ('c', символ)     один символ
+#   ('.', r, s)       конкатенация (всегда правоассоциативная)
+#   ('|', frozenset)  объединение
+#   ('&', frozenset)  пересечение
+#   ('*', r)          замыкание Клини
+#   ('~', r)          дополнение
+# Конструкторы ниже сразу приводят выражения к нормальной форме (ACI для | и &,
+# нейтральные и поглощающие элементы, r** = r*, ~~r = r), поэтому множество
+# различных производных конечно и получающийся ДКА близок к минимальному.
+
+EMPTY = ('0',)
+EPSILON = ('ε',)
+ANY = ('~', EMPTY)  # Σ* — дополнение пустого языка
+
+
+def char(symbol):
+    return ('c', symbol)
+
+
+def concat(left, right):
+    if left == EMPTY or right == EMPTY:
+        return EMPTY
+    if left == EPSILON:
+        return right
+    if right == EPSILON:
+        return left
+    if left[0] == '.':
+        return ('.', left[1], concat(left[2], right))
+    return ('.', left, right)
+
+
+def _flatten(tag, items):
+    flat = set()
+    for item in items:
+        if item[0] == tag:
+            flat.update(item[1])
+        else:
+            flat.add(item)
+    return flat
+
+
+def union(*items):
+    flat = _flatten('|', items)
+    flat.discard(EMPTY)
+    if ANY in flat:
+        return ANY
+    if not flat:
+        return EMPTY
+    if len(flat) == 1:
+        return next(iter(flat))
+    return ('|', frozenset(flat))
+
+
+def intersection(*items):
+    flat = _flatten('&', items)
+    if EMPTY in flat:
+        return EMPTY
+    flat.discard(ANY)
+    if not flat:
+        return ANY
+    if len(flat) == 1:
+        return next(iter(flat))
+    return ('&', frozenset(flat))
+
+
+def star(inner):
+    if inner[0] == '*':
+        return inner
+    if inner in (EMPTY, EPSILON):
+        return EPSILON
+    return ('*', inner)
+
+
+def complement(inner):
+    if inner[0] == '~':
+        return inner[1]
+    return ('~', inner)
+
+
+@lru_cache(maxsize=65536)
+def nullable(expr) -> bool:
+    """Принимает ли выражение пустую строку."""
+    match expr[0]:
+        case 'ε' | '*':
+            return True
+        case '0' | 'c':
+            return False
+        case '.':
+            return nullable(expr[1]) and nullable(expr[2])
+        case '|':
+            return any(nullable(item) for item in expr[1])
+        case '&':
+            return all(nullable(item) for item in expr[1])
+        case '~':
+            return not nullable(expr[1])
+
+
+def derivative(expr, symbol):
+    """Производная Бржозовского выражения expr по символу symbol."""
+    match expr[0]:
+        case '0' | 'ε':
+            return EMPTY
+        case 'c':
+            return EPSILON if expr[1] == symbol else EMPTY
+        case '.':
+            head = concat(derivative(expr[1], symbol), expr[2])
+            if nullable(expr[1]):
+                return union(head, derivative(expr[2], symbol))
+            return head
+        case '|':
+            return union(*(derivative(item, symbol) for item in expr[1]))
+        case '&':
+            return intersection(*(derivative(item, symbol) for item in expr[1]))
+        case '*':
+            return concat(derivative(expr[1], symbol), expr)
+        case '~':
+            return complement(derivative(expr[1], symbol))
+
+
+def symbols(expr) -> set:
+    """Символы, явно встречающиеся в выражении."""
+    result = set()
+    stack = [expr]
+    while stack:
+        item = stack.pop()
+        match item[0]:
+            case 'c':
+                result.add(item[1])
+            case '.':
+                stack.extend(item[1:])
+            case '|' | '&':
+                stack.extend(item[1])
+            case '*' | '~':
+                stack.append(item[1])
+    return result
+
+
+def _has_complement(expr) -> bool:
+    match expr[0]:
+        case '~':
+            return True
+        case '.':
+            return _has_complement(expr[1]) or _has_complement(expr[2])
+        case '|' | '&':
+            return any(_has_complement(item) for item in expr[1])
+        case '*':
+            return _has_complement(expr[1])
+    return False
+
+
+def from_ast(node: RegexNode):
+    """Переводит синтаксическое дерево в нормализованное выражение."""
+    match node.op:
+        case RegexOp.CHAR:
+            return char(node.value)
+        case RegexOp.CONCAT:
+            expr = EPSILON
+            for child in reversed(node.children):
+                expr = concat(from_ast(child), expr)
+            return expr
+        case RegexOp.ALT:
+            return union(*(from_ast(child) for child in node.children))
+        case RegexOp.KLEENE:
+            return star(from_ast(node.children[0]))
+        case RegexOp.OPTIONAL:
+            return union(EPSILON, from_ast(node.children[0]))
+        case RegexOp.REPEAT:
+            inner = from_ast(node.children[0])
+            expr = EPSILON
+            for _ in range(node.value):
+                expr = concat(inner, expr)
+            return expr
+        case RegexOp.GROUP | RegexOp.NAMED_GROUP:
+            return from_ast(node.children[0])
+        case RegexOp.NAMED_REF:
+            raise ValueError(f"Named reference <{node.name}> is not supported by the derivatives engine")
+        case _:
+            raise ValueError(f"Unknown operation: {node.op}")
+
+
+class DerivativeDFA:
+    """
+    ДКА, состояния которого — производные исходного выражения.
+    Состояния строятся лениво: переход вычисляется при первом обращении
+    и запоминается в DFAState.transitions. Пустой язык ∅ — это ловушка,
+    переходы в неё не сохраняются (как и в остальных ДКА библиотеки).
+    Если в выражении есть дополнение, алфавит расширяется печатными ASCII
+    символами (как в complement_dfa), иначе это символы самого выражения.
+    Объект можно разделять между потоками: уже построенные переходы читаются
+    без блокировки, а достраивание автомата выполняется под self._lock.
+    """
+
+    def __init__(self, expr, alphabet=None):
+        if alphabet is None:
+            alphabet = symbols(expr)
+            if _has_complement(expr):
+                alphabet |= {chr(c) for c in range(32, 127)}
+        self.alphabet = frozenset(alphabet)
+        self.dfa = DFA()
+        self._states = {}   # выражение -> DFAState
+        self._exprs = {}    # DFAState -> выражение
+        self._explored = set()
+        self._dead = set()  # (состояние, символ), ведущие в ∅
+        self._lock = threading.RLock()
+        self.dfa.start = self.state(expr)
+
+    def state(self, expr):
+        state = self._states.get(expr)
+        if state is None:
+            state = DFAState(f"d{len(self._states)}", frozenset())
+            state.is_end = nullable(expr)
+            self._states[expr] = state
+            self._exprs[state] = expr
+            self.dfa.states.append(state)
+        return state
+
+    def step(self, state, symbol):
+        """Переход из состояния по символу; None — переход в ловушку."""
+        target = state.transitions.get(symbol)
+        if target is not None or state in self._explored:
+            return target
+        if symbol not in self.alphabet or (state, symbol) in self._dead:
+            return None
+        with self._lock:
+            target = state.transitions.get(symbol)
+            if target is not None:
+                return target  # другой поток успел построить переход
+            expr = derivative(self._exprs[state], symbol)
+            if expr == EMPTY:
+                self._dead.add((state, symbol))
+                return None
+            target = self.state(expr)
+            state.transitions[symbol] = target
+        return target
+
+    def explore(self, state):
+        if state not in self._explored:
+            with self._lock:
+                for symbol in self.alphabet:
+                    self.step(state, symbol)
+                self._explored.add(state)
+
+    def to_dfa(self, budget=None) -> DFA:
+        """Достраивает все достижимые состояния и возвращает полный ДКА."""
+        meter = meter_for(budget, "dfa")
+        queue = deque([self.dfa.start])
+        seen = {self.dfa.start}
+        while queue:
+            state = queue.popleft()
+            self.explore(state)
+            for target in state.transitions.values():
+                if target not in seen:
+                    if meter is not None:
+                        meter.add_state(self._exprs[target])
+                    seen.add(target)
+                    queue.append(target)
+        return self.dfa
+
+    def accepts(self, string) -> bool:
+        """Полное совпадение строки, состояния достраиваются по мере необходимости."""
+        state = self.dfa.start
+        for ch in string:
+            state = self.step(state, ch)
+            if state is None:
+                return False
+        return state.is_end
+
+    def match(self, string):
+        if self.accepts(string):
+            return MatchResult(string, 0, len(string))
+        return None
+
+    def find(self, string, pos=0):
+        """Самое левое, затем кратчайшее непустое вхождение не левее pos: (начало, конец) или None."""
+        return leftmost_shortest(self._shortest_end, string, pos)
+
+    def _shortest_end(self, string, start):
+        state = self.dfa.start
+        for i in range(start, len(string)):
+            state = self.step(state, string[i])
+            if state is None:
+                return -1
+            if state.is_end:
+                return i + 1
+        return -1
+
+
+def build_dfa(expr, alphabet=None, budget=None) -> DFA:
+    return DerivativeDFA(expr, alphabet).to_dfa(budget)
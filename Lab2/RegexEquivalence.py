@@ -0,0 +1,121 @@
+from collections import deque
+
+
+class CheckResult:
+    """
+    Результат проверки над языками ДКА.
+    Истинен, если свойство выполняется; иначе counterexample — кратчайшая
+    строка, на которой оно нарушается.
+    """
+
+    __slots__ = ('holds', 'counterexample')
+
+    def __init__(self, holds, counterexample=None):
+        self.holds = holds
+        self.counterexample = counterexample
+
+    def __bool__(self):
+        return self.holds
+
+    def __repr__(self):
+        if self.holds:
+            return "CheckResult(True)"
+        return f"CheckResult(False, counterexample={self.counterexample!r})"
+
+
+def _step(state, symbol):
+    # None — неявное ловушечное состояние (перехода нет)
+    return None if state is None else state.transitions.get(symbol)
+
+
+def _accepting(state):
+    return state is not None and state.is_end
+
+
+def _symbols(*states):
+    result = set()
+    for state in states:
+        if state is not None:
+            result.update(state.transitions)
+    return sorted(result)
+
+
+def _word(parent, pair):
+    symbols = []
+    while parent[pair] is not None:
+        pair, symbol = parent[pair]
+        symbols.append(symbol)
+    return ''.join(reversed(symbols))
+
+
+def dfa_equivalent(dfa1, dfa2) -> CheckResult:
+    """
+    Проверка эквивалентности по Хопкрофту–Карпу: пары состояний объединяются
+    в системе непересекающихся множеств, произведение автоматов не строится.
+    Обход в ширину даёт кратчайший контрпример (строку, принимаемую ровно одним из ДКА).
+    """
+    leader = {}
+
+    def find(state):
+        root = state
+        while leader.get(root, root) is not root:
+            root = leader[root]
+        while state is not root:
+            state, leader[state] = leader.get(state, state), root
+        return root
+
+    start = (dfa1.start, dfa2.start)
+    leader[dfa2.start] = dfa1.start
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        p, q = pair
+        if _accepting(p) != _accepting(q):
+            return CheckResult(False, _word(parent, pair))
+        for symbol in _symbols(p, q):
+            nxt = (_step(p, symbol), _step(q, symbol))
+            root1, root2 = find(nxt[0]), find(nxt[1])
+            if root1 is not root2:
+                leader[root2] = root1
+                parent[nxt] = (pair, symbol)
+                queue.append(nxt)
+    return CheckResult(True)
+
+
+def dfa_is_subset(dfa1, dfa2) -> CheckResult:
+    """L(dfa1) ⊆ L(dfa2); контрпример — кратчайшая строка из L(dfa1) \\ L(dfa2)."""
+    start = (dfa1.start, dfa2.start)
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        p, q = pair
+        if p.is_end and not _accepting(q):
+            return CheckResult(False, _word(parent, pair))
+        for symbol in sorted(p.transitions):
+            nxt = (p.transitions[symbol], _step(q, symbol))
+            if nxt not in parent:
+                parent[nxt] = (pair, symbol)
+                queue.append(nxt)
+    return CheckResult(True)
+
+
+def dfa_is_empty(dfa) -> CheckResult:
+    """Пуст ли язык ДКА; если нет, counterexample — кратчайшая принимаемая строка."""
+    parent = {dfa.start: None}
+    queue = deque([dfa.start])
+    while queue:
+        state = queue.popleft()
+        if state.is_end:
+            symbols = []
+            while parent[state] is not None:
+                state, symbol = parent[state]
+                symbols.append(symbol)
+            return CheckResult(False, ''.join(reversed(symbols)))
+        for symbol in sorted(state.transitions):
+            target = state.transitions[symbol]
+            if target not in parent:
+                parent[target] = (state, symbol)
+                queue.append(target)
+    return CheckResult(True)
@@ -0,0 +1,61 @@
+from collections import deque
+from RegexNode import RegexNode
+from RegexPositions import positions, iter_bits
+from RegexDFA import DFA, DFAState
+from RegexBudget import meter_for
+
+
+def followpos_to_dfa(node: RegexNode, budget=None) -> DFA:
+    """
+    Прямое построение ДКА по дереву (алгоритм Ахо–Сети–Ульмана).
+    По узлам считаются nullable/firstpos/lastpos/followpos (см. RegexPositions),
+    после чего метод подмножеств работает над множествами позиций, а не над
+    ε-замыканиями состояний НКА. Множество позиций хранится битовой маской:
+    бит 0 — начальное состояние (роль маркера конца в классическом алгоритме
+    играет флаг nullable), позиция p — бит p + 1.
+    budget (RegexBudget.Budget) ограничивает построение; при превышении — BudgetExceeded.
+    """
+    meter = meter_for(budget, "dfa")
+    info = positions(node)
+    symbols = info.symbols
+    follow = (info.first << 1,) + tuple(mask << 1 for mask in info.follow)
+    final = (info.last << 1) | (1 if info.nullable else 0)
+
+    char_masks = {}
+    for p, symbol in enumerate(symbols):
+        char_masks[symbol] = char_masks.get(symbol, 0) | (1 << (p + 1))
+
+    dfa = DFA()
+    start = DFAState("q0", frozenset())
+    start.is_end = bool(final & 1)
+    dfa.start = start
+    dfa.states.append(start)
+    state_map = {1: start}
+    queue = deque([(1, start)])
+
+    while queue:
+        mask, current = queue.popleft()
+        reach = 0
+        for p in iter_bits(mask):
+            reach |= follow[p]
+
+        # Символы, по которым есть переход: метки достижимых позиций
+        seen_symbols = set()
+        for p in iter_bits(reach):
+            symbol = symbols[p - 1]
+            if symbol in seen_symbols:
+                continue
+            seen_symbols.add(symbol)
+            target_mask = reach & char_masks[symbol]
+            target = state_map.get(target_mask)
+            if target is None:
+                if meter is not None:
+                    meter.add_state(target_mask)
+                target = DFAState(f"q{len(dfa.states)}", frozenset())
+                target.is_end = bool(target_mask & final)
+                state_map[target_mask] = target
+                dfa.states.append(target)
+                queue.append((target_mask, target))
+            current.transitions[symbol] = target
+
+    return dfa
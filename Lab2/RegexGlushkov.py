@@ -0,0 +1,125 @@
+from RegexNode import RegexNode
+from RegexPositions import positions
+from RegexMatch import MatchResult, leftmost_shortest
+
+MAX_POSITIONS = 64  # больше позиций — уже выгоднее полноценный ДКА
+CHUNK = 8           # ширина блока битов, для которого табулируются переходы
+
+
+class GlushkovAutomaton:
+    """
+    Позиционный автомат Глушкова: без ε-переходов, одно состояние на каждый CHAR
+    плюс начальное. Состояние i хранится битом i (бит 0 — начальное состояние,
+    позиция p — бит p + 1), множество активных состояний — одно целое число.
+    - symbols: символ каждой позиции
+    - char_masks: {символ: маска состояний, помеченных этим символом}
+    - follow: follow[i] — маска состояний, достижимых из состояния i
+    - final: маска принимающих состояний
+    """
+
+    def __init__(self, node: RegexNode):
+        info = positions(node)
+        self.size = len(info) + 1
+        self.symbols = info.symbols
+        self.follow = (info.first << 1,) + tuple(mask << 1 for mask in info.follow)
+        self.final = (info.last << 1) | (1 if info.nullable else 0)
+        self.char_masks = {}
+        for p, symbol in enumerate(info.symbols):
+            self.char_masks[symbol] = self.char_masks.get(symbol, 0) | (1 << (p + 1))
+
+    def is_linear(self) -> bool:
+        """Каждое состояние ведёт только в следующее — подходит классический Shift-And."""
+        return all(mask & ~(1 << (i + 1)) == 0 for i, mask in enumerate(self.follow))
+
+
+class BitParallelMatcher:
+    """
+    Бит-параллельная симуляция автомата Глушкова (Shift-And в обобщении Наварро–Раффино).
+    Шаг по символу c: D' = Follow(D) & B[c], где Follow(D) — объединение follow-масок
+    активных состояний. Follow(D) берётся из таблиц, посчитанных для каждого
+    8-битного блока маски, поэтому шаг — несколько целочисленных операций.
+    Для линейных выражений (без циклов и альтернатив) шаг — просто (D << 1) & B[c].
+    """
+
+    def __init__(self, node: RegexNode, max_positions=MAX_POSITIONS):
+        self.automaton = GlushkovAutomaton(node)
+        if self.automaton.size - 1 > max_positions:
+            raise ValueError(f"Pattern has {self.automaton.size - 1} positions, "
+                             f"bit-parallel matching is limited to {max_positions}")
+        self.char_masks = self.automaton.char_masks
+        self.final = self.automaton.final
+        self.linear = self.automaton.is_linear()
+        self.tables = self._build_tables(self.automaton.follow)
+
+    @staticmethod
+    def _build_tables(follow):
+        tables = []
+        for base in range(0, len(follow), CHUNK):
+            chunk = follow[base:base + CHUNK]
+            table = [0] * (1 << len(chunk))
+            for bits in range(1, len(table)):
+                low = bits & -bits
+                table[bits] = table[bits ^ low] | chunk[low.bit_length() - 1]
+            tables.append(table)
+        return tables
+
+    def step(self, active: int, symbol) -> int:
+        """Множество активных состояний после чтения символа."""
+        mask = self.char_masks.get(symbol, 0)
+        if self.linear:
+            return (active << 1) & mask
+        reach = 0
+        for table in self.tables:
+            if not active:
+                break
+            reach |= table[active & (len(table) - 1)]
+            active >>= CHUNK
+        return reach & mask
+
+    def _run(self, string, start):
+        """Длина кратчайшего непустого совпадения, начинающегося в start, или -1."""
+        active = 1
+        for pos in range(start, len(string)):
+            active = self.step(active, string[pos])
+            if not active:
+                return -1
+            if active & self.final:
+                return pos + 1
+        return -1
+
+    def _first_end(self, string, start=0) -> int:
+        """Позиция конца самого раннего заканчивающегося совпадения (неякорный проход) или -1."""
+        active = 0
+        for pos in range(start, len(string)):
+            active = self.step(active | 1, string[pos])
+            if active & self.final:
+                return pos + 1
+        return -1
+
+    def accepts(self, string) -> bool:
+        active = 1
+        for symbol in string:
+            active = self.step(active, symbol)
+            if not active:
+                return False
+        return bool(active & self.final)
+
+    def match(self, string):
+        if self.accepts(string):
+            return MatchResult(string, 0, len(string))
+        return None
+
+    def find(self, string, pos=0):
+        """Границы самого левого (а среди них — кратчайшего) непустого вхождения не левее pos."""
+        first_end = self._first_end(string, pos)
+        if first_end == -1:
+            return None
+        # Совпадение, закончившееся в first_end, начинается раньше него —
+        # значит, самое левое начало не правее first_end - 1
+        return leftmost_shortest(self._run, string, pos, stop=first_end)
+
+    def search(self, string):
+        """Самое левое (а среди них — кратчайшее) непустое вхождение, как search_nfa."""
+        span = self.find(string)
+        return MatchResult(string, *span) if span is not None else None
+
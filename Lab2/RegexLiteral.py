@@ -0,0 +1,101 @@
+from RegexNode import RegexOp, RegexNode
+from RegexAhoCorasick import AhoCorasick
+
+MAX_LITERALS = 1000  # больше вариантов — конечный язык выгоднее обслуживать автоматом
+
+
+def literal_of(node: RegexNode):
+    """Строка, которую задаёт выражение из одних CHAR/CONCAT/REPEAT, иначе None."""
+    match node.op:
+        case RegexOp.CHAR:
+            return node.value
+        case RegexOp.CONCAT:
+            parts = [literal_of(child) for child in node.children]
+            return None if None in parts else ''.join(parts)
+        case RegexOp.REPEAT:
+            inner = literal_of(node.children[0])
+            return None if inner is None else inner * node.value
+    return None
+
+
+def literal_set(node: RegexNode, limit=MAX_LITERALS):
+    """
+    Конечное множество строк, которое задаёт выражение без замыканий и групп
+    (CHAR, CONCAT, ALT, OPTIONAL, REPEAT), списком без повторов; None, если язык
+    бесконечен, есть группы или строк больше limit.
+    """
+    match node.op:
+        case RegexOp.CHAR:
+            return [node.value]
+        case RegexOp.ALT | RegexOp.OPTIONAL:
+            words = [''] if node.op == RegexOp.OPTIONAL else []
+            for child in node.children:
+                part = literal_set(child, limit)
+                if part is None:
+                    return None
+                words.extend(part)
+            words = list(dict.fromkeys(words))
+            return words if len(words) <= limit else None
+        case RegexOp.CONCAT | RegexOp.REPEAT:
+            parts = node.children if node.op == RegexOp.CONCAT else node.children * node.value
+            words = ['']
+            for child in parts:
+                part = literal_set(child, limit)
+                if part is None or len(words) * len(part) > limit:
+                    return None
+                words = list(dict.fromkeys(w + p for w in words for p in part))
+            return words
+    return None
+
+
+class LiteralEngine:
+    """
+    Одна строка: поиск через str.find (в CPython это уже реализованный на C
+    гибрид Бойера–Мура–Хорспула и two-way), сравнение — через ==.
+    """
+
+    def __init__(self, literal):
+        self.literal = literal
+
+    def accepts(self, string):
+        return string == self.literal
+
+    def find(self, string, pos=0):
+        if not self.literal:
+            return None  # пустая строка не даёт непустых совпадений
+        start = string.find(self.literal, pos)
+        return None if start == -1 else (start, start + len(self.literal))
+
+
+class MultiLiteralEngine:
+    """
+    Несколько строк: полное совпадение — поиск во множестве, поиск — автомат
+    Ахо–Корасик (RegexAhoCorasick). Из всех вхождений выбирается самое левое,
+    а среди них самое короткое (как у остальных движков); сканирование
+    останавливается, как только более левое вхождение уже не может закончиться дальше.
+    """
+
+    def __init__(self, words):
+        self.words = frozenset(words)
+        self.max_len = max(len(w) for w in words)
+        self.automaton = AhoCorasick(sorted(w for w in self.words if w))
+
+    def accepts(self, string):
+        return string in self.words
+
+    def find(self, string, pos=0):
+        automaton = self.automaton
+        root = automaton.dfa.start
+        outputs = automaton.outputs
+        state = root
+        best = None
+        for i in range(pos, len(string)):
+            state = state.transitions.get(string[i], root)
+            # outputs начинаются с самого длинного слова — оно начинается левее всех
+            if state.is_end:
+                start = i + 1 - outputs[state][0][1]
+                if best is None or start < best[0]:
+                    best = (start, i + 1)
+            if best is not None and i + 2 - self.max_len >= best[0]:
+                break
+        return best
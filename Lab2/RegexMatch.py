@@ -0,0 +1,89 @@
+class MatchResult:
+    """
+    Результат сопоставления — общий для всех движков.
+    Хранит ссылку на исходную строку и целочисленные границы, подстроки
+    (full_match, группы) вычисляются только при обращении к ним.
+    - string: строка, в которой найдено совпадение
+    - start, end: границы совпадения (абсолютные позиции во входе)
+    - spans: {имя группы: (начало, конец)} или None, если групп нет
+    - offset: позиция string во входе (для потокового поиска, где хранится лишь хвост входа)
+    """
+
+    __slots__ = ('string', 'start', 'end', 'spans', 'offset')
+
+    def __init__(self, string, start, end, spans=None, offset=0):
+        self.string = string
+        self.start = start
+        self.end = end
+        self.spans = spans
+        self.offset = offset
+
+    def _slice(self, start, end):
+        return self.string[start - self.offset:end - self.offset]
+
+    @property
+    def full_match(self):
+        return self._slice(self.start, self.end)  # Совпавшая подстрока
+
+    @property
+    def groups(self):
+        if not self.spans:
+            return {}
+        return {name: self._slice(start, end) for name, (start, end) in self.spans.items()}  # Словарь именованных групп
+
+    def span(self, name=None):
+        """Границы совпадения или именованной группы."""
+        if name is None:
+            return self.start, self.end
+        return self.spans.get(name) if self.spans else None
+
+    def __getitem__(self, key):
+        span = self.spans.get(key) if self.spans else None
+        return None if span is None else self._slice(*span)  # Позволяет доступ к группам по имени через []
+
+    def __iter__(self):
+        return iter(self.groups.items())  # Позволяет итерироваться по группам
+
+    def __bool__(self):
+        return True
+
+    def __str__(self):
+        return f"Result(start: {self.start}, end: {self.end}, fill_match: {self.full_match}, groups: {self.groups})"
+
+
+def leftmost_shortest(shortest_end, string, pos=0, stop=None, first=None):
+    """
+    Правило поиска всех движков: самое левое, а среди них кратчайшее непустое
+    вхождение не левее pos — (начало, конец) или None.
+    shortest_end(string, start) — конец кратчайшего непустого совпадения,
+    начинающегося в start, или -1. Начала перебираются до stop (по умолчанию —
+    до конца строки); first — символы, с которых совпадение может начаться:
+    с остальных позиций shortest_end не вызывается.
+    """
+    starts = range(pos, len(string) if stop is None else stop)
+    if first is None:
+        for start in starts:
+            end = shortest_end(string, start)
+            if end != -1:
+                return start, end
+        return None
+    for start in starts:
+        if string[start] in first:
+            end = shortest_end(string, start)
+            if end != -1:
+                return start, end
+    return None
+
+
+def iter_spans(find, string):
+    """
+    Непересекающиеся вхождения по очереди: find(string, pos) -> (начало, конец) | None,
+    каждый следующий поиск начинается с конца предыдущего вхождения.
+    """
+    pos = 0
+    while True:
+        span = find(string, pos)
+        if span is None:
+            return
+        yield span
+        pos = span[1]
@@ -1,35 +1,17 @@
 from RegexNode import RegexOp, RegexNode
 from typing import Dict, Tuple
 import graphviz
-from collections import deque
-
-
-class MatchResult:
-    def __init__(self, start, end, full_match, groups):
-        self.start = start  # Начальная позиция совпадения
-        self.end = end  # Конечная позиция совпадения
-        self.full_match = full_match  # Совпавшая подстрока
-        self.groups = groups  # Словарь именованных групп
-
-    def __getitem__(self, key):
-        return self.groups.get(key, None)  # Позволяет доступ к группам по имени через []
-
-    def __iter__(self):
-        return iter(self.groups.items())  # Позволяет итерироваться по группам
-
-    def __str__(self):
-        return f"Result(start: {self.start}, end: {self.end}, fill_match: {self.full_match}, groups: {self.groups})"
-
-
+from heapq import heappush, heappop
+from itertools import count
+from RegexMatch import MatchResult
 
 
 # Класс состояния автомата
 class State:
-    _id_counter = 0
+    _ids = count()  # next() на itertools.count атомарен — имена уникальны и при сборке из нескольких потоков
 
     def __init__(self, is_end=False):
-        self.name = f"S{State._id_counter}"
-        State._id_counter += 1
+        self.name = f"S{next(State._ids)}"
 
         self.transitions: Dict[str, list[State]] = {}  # Переходы по символам
         self.epsilon: list[State] = []  # Epsilon-переходы
@@ -65,12 +47,108 @@ def insert_named_ref_nfa(name: str, next_state: 'State') -> Tuple['State', 'Stat
     return start, next_state
 
 
+# Плоский шаблон фрагмента НКА: состояния пронумерованы, переходы — тройки (из, символ, в).
+# Шаблон строится один раз на интернированный узел и затем лишь «штампуется» в новые состояния.
+class NFATemplate:
+    __slots__ = ('size', 'edges', 'start', 'end')
+
+    def __init__(self, size: int, edges: tuple, start: int, end: int):
+        self.size = size
+        self.edges = edges
+        self.start = start
+        self.end = end
+
+    def instantiate(self) -> NFA:
+        states = [State() for _ in range(self.size)]
+        for source, symbol, target in self.edges:
+            states[source].add_transition(symbol, states[target])
+        return NFA(states[self.start], states[self.end])
+
+
+def _is_group_free(node: RegexNode) -> bool:
+    # Фрагменты с группами зависят от контекста (ссылки на ранее определённые группы)
+    if node.op in (RegexOp.NAMED_GROUP, RegexOp.NAMED_REF):
+        return False
+    return all(child.memo('group_free', _is_group_free) for child in node.children)
+
+
+def is_group_free(node: RegexNode) -> bool:
+    """Нет ли в поддереве именованных групп и ссылок (результат кешируется на узле)."""
+    return node.memo('group_free', _is_group_free)
+
+
+def _chain(templates, edges, offset):
+    """Последовательно соединяет шаблоны ε-переходами, возвращает (начало, конец, следующий свободный номер)."""
+    start = end = None
+    for tpl in templates:
+        edges.extend((src + offset, sym, dst + offset) for src, sym, dst in tpl.edges)
+        if end is None:
+            start = tpl.start + offset
+        else:
+            edges.append((end, 'ε', tpl.start + offset))
+        end = tpl.end + offset
+        offset += tpl.size
+    return start, end, offset
+
+
+def nfa_template(node: RegexNode, child=None) -> NFATemplate:
+    """
+    Строит шаблон фрагмента НКА той же формы, что и NFAConstructor.build.
+    child(n) — шаблон дочернего узла, по умолчанию кешированный nfa_template.
+    """
+    if child is None:
+        def child(n):
+            return n.memo('nfa_template', nfa_template)
+
+    edges = []
+    match node.op:
+        case RegexOp.CHAR:
+            return NFATemplate(2, ((0, node.value, 1),), 0, 1)
+
+        case RegexOp.CONCAT:
+            start, end, size = _chain([child(c) for c in node.children], edges, 0)
+            return NFATemplate(size, tuple(edges), start, end)
+
+        case RegexOp.ALT:
+            size = 2
+            for c in node.children:
+                tpl = child(c)
+                edges.extend((src + size, sym, dst + size) for src, sym, dst in tpl.edges)
+                edges.append((0, 'ε', tpl.start + size))
+                edges.append((tpl.end + size, 'ε', 1))
+                size += tpl.size
+            return NFATemplate(size, tuple(edges), 0, 1)
+
+        case RegexOp.KLEENE | RegexOp.OPTIONAL:
+            tpl = child(node.children[0])
+            edges.extend((src + 2, sym, dst + 2) for src, sym, dst in tpl.edges)
+            edges.append((0, 'ε', tpl.start + 2))
+            edges.append((0, 'ε', 1))
+            if node.op == RegexOp.KLEENE:
+                edges.append((tpl.end + 2, 'ε', tpl.start + 2))
+            edges.append((tpl.end + 2, 'ε', 1))
+            return NFATemplate(tpl.size + 2, tuple(edges), 0, 1)
+
+        case RegexOp.REPEAT:
+            if node.value == 0:
+                return NFATemplate(2, ((0, 'ε', 1),), 0, 1)
+            start, end, size = _chain([child(node.children[0])] * node.value, edges, 0)
+            return NFATemplate(size, tuple(edges), start, end)
+
+        case _:
+            raise ValueError(f"Unknown operation: {node.op}")
+
+
 # Конструктор НКА из синтаксического дерева регулярного выражения
 class NFAConstructor:
-    def __init__(self):
+    def __init__(self, reuse=True):
         self.named_groups = {}  # Словарь с сохранёнными именованными группами
+        self.reuse = reuse  # Использовать кешированные шаблоны фрагментов интернированных узлов
 
     def build(self, node: RegexNode) -> NFA:
+        if self.reuse and is_group_free(node):
+            return node.memo('nfa_template', nfa_template).instantiate()
+
         match node.op:
             case RegexOp.CHAR:
                 # Один символ
@@ -168,6 +246,22 @@ class NFAConstructor:
                 raise ValueError(f"Unknown operation: {node.op}")
 
 
+# Все состояния, достижимые из начального (по символам и ε-переходам)
+def collect_states(nfa: NFA) -> list[State]:
+    visited = {nfa.start}
+    order = [nfa.start]
+    stack = [nfa.start]
+    while stack:
+        state = stack.pop()
+        for targets in list(state.transitions.values()) + [state.epsilon]:
+            for target in targets:
+                if target not in visited:
+                    visited.add(target)
+                    order.append(target)
+                    stack.append(target)
+    return order
+
+
 # Визуализация автомата через graphviz
 def draw_nfa(nfa: NFA, filename="nfa"):
     dot = graphviz.Digraph(format="png")
@@ -194,26 +288,44 @@ def draw_nfa(nfa: NFA, filename="nfa"):
 
 
 # Симуляция выполнения НКА с поддержкой захвата и сравнения именованных групп
-def match_nfa(nfa: NFA, input_str: str):
-    queue = deque()
+def match_nfa(nfa: NFA, input_str: str, stats=None, start=0, full=False):
+    """
+    Ищет кратчайшее непустое совпадение, начинающееся с позиции start.
+    При full=True совпадение должно покрывать строку до конца (в том числе пустую).
+    Захваты хранятся границами (начало, конец), подстроки строит MatchResult.
+    """
+    # Очередь упорядочена по позиции во входе (при равной — в порядке добавления):
+    # первое достигнутое завершающее состояние даёт действительно кратчайшее совпадение,
+    # сколько бы ε-переходов ни было на пути
+    queue = []
+    order = count()
+
+    def push(state, pos, captures, group_starts):
+        heappush(queue, (pos, next(order), state, captures, group_starts))
+
     visited = set()
-    queue.append((nfa.start, 0, {}, {}))  # состояние, позиция, захваты, стартовые позиции групп
+    push(nfa.start, start, {}, {})  # состояние, позиция, захваты, стартовые позиции групп
 
     while queue:
-        state, pos, captures, group_starts = queue.popleft()
+        pos, _, state, captures, group_starts = heappop(queue)
 
         key = (state.name, pos, tuple(sorted(captures.items())), tuple(sorted(group_starts.items())))
         if key in visited:
             continue
         visited.add(key)
+        if stats is not None:
+            stats.visit(state)
 
         if state.is_end:
-            matched = input_str[:pos]
-            return MatchResult(full_match=matched, start=0, end=pos, groups=captures) if matched else None  # <--- Возвращаем нужные значения
+            if pos == len(input_str) if full else pos > start:
+                return MatchResult(input_str, start, pos, captures)  # <--- Возвращаем нужные значения
+            continue  # пустое (или неполное) совпадение — ищем дальше
 
         # Epsilon-переходы
         for next_state in state.epsilon:
-            queue.append((next_state, pos, captures.copy(), group_starts.copy()))
+            if stats is not None:
+                stats.transition(state, 'ε', next_state)
+            push(next_state, pos, captures.copy(), group_starts.copy())
 
         # Обычные переходы
         for symbol, next_states in state.transitions.items():
@@ -222,39 +334,50 @@ def match_nfa(nfa: NFA, input_str: str):
                     group_name = symbol[7:-1]
                     new_group_starts = group_starts.copy()
                     new_group_starts[group_name] = pos
-                    queue.append((next_state, pos, captures.copy(), new_group_starts))
+                    if stats is not None:
+                        stats.transition(state, symbol, next_state)
+                    push(next_state, pos, captures.copy(), new_group_starts)
 
                 elif symbol.startswith("<end:") and symbol.endswith(">"):
                     group_name = symbol[5:-1]
                     if group_name not in group_starts:
                         continue
-                    start_pos = group_starts[group_name]
-                    captured = input_str[start_pos:pos]
                     new_captures = captures.copy()
-                    new_captures[group_name] = captured
-                    queue.append((next_state, pos, new_captures, group_starts.copy()))
+                    new_captures[group_name] = (group_starts[group_name], pos)
+                    if stats is not None:
+                        stats.transition(state, symbol, next_state)
+                    push(next_state, pos, new_captures, group_starts.copy())
 
                 elif symbol.startswith("<ref:") and symbol.endswith(">"):
                     group_name = symbol[5:-1]
                     if group_name not in captures:
                         continue
-                    val = captures[group_name]
-                    if input_str.startswith(val, pos):
-                        queue.append((next_state, pos + len(val), captures.copy(), group_starts.copy()))
+                    ref_start, ref_end = captures[group_name]
+                    if input_str.startswith(input_str[ref_start:ref_end], pos):
+                        if stats is not None:
+                            stats.transition(state, symbol, next_state)
+                        push(next_state, pos + ref_end - ref_start, captures.copy(), group_starts.copy())
 
                 elif pos < len(input_str) and input_str[pos] == symbol:
-                    queue.append((next_state, pos + 1, captures.copy(), group_starts.copy()))
+                    if stats is not None:
+                        stats.transition(state, symbol, next_state)
+                    push(next_state, pos + 1, captures.copy(), group_starts.copy())
 
     return None  # <--- Возврат None, если совпадения нет
 
 
-def search_nfa(nfa, string):
+def search_nfa(nfa, string, stats=None):
     """
     Поиск первого вхождения подстроки, соответствующей регулярному выражению.
     Возвращает MatchResult при успехе или None.
     """
     for start_pos in range(len(string)):  # Проходим по всем возможным позициям начала строки
-        result = match_nfa(nfa, string[start_pos:])  # Пытаемся найти совпадение с текущей позиции
+        result = match_nfa(nfa, string, stats, start_pos)  # Пытаемся найти совпадение с текущей позиции
         if result is not None:  # Если найдено совпадение
-            return MatchResult(start_pos, start_pos + result.end, result.full_match, result.groups)  # Возвращаем объект совпадения
+            return result  # Возвращаем объект совпадения
     return None  # Если ничего не найдено – возвращаем None
+
+
+def accepts_nfa(nfa, string) -> bool:
+    """Принимает ли НКА строку целиком (без построения объекта результата)."""
+    return match_nfa(nfa, string, full=True) is not None
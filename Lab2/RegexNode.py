@@ -1,5 +1,7 @@
+import threading
+import weakref
 from enum import Enum
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Callable, Any
 
 
 class RegexOp(Enum):
@@ -15,17 +17,55 @@ class RegexOp(Enum):
 
 
 class RegexNode:
-    def __init__(
-        self,
+    """
+    Узел синтаксического дерева регулярного выражения.
+    Узлы интернируются (hash-consing): структурно одинаковые поддеревья — это один
+    и тот же объект, поэтому результаты, посчитанные для узла (фрагмент НКА,
+    позиции и т.п.), переиспользуются всеми выражениями, где он встречается.
+    Узлы неизменяемы: children хранится кортежем.
+    """
+
+    _interned = weakref.WeakValueDictionary()  # (op, value, children, name) -> узел
+    _intern_lock = threading.Lock()            # парсеры в разных потоках должны получить один и тот же узел
+
+    def __new__(
+        cls,
         op: RegexOp,
         value: Optional[Union[str, int]] = None,
         children: Optional[List['RegexNode']] = None,
         name: Optional[str] = None
     ):
-        self.op = op
-        self.value = value
-        self.children = children or []
-        self.name = name
+        children = tuple(children or ())
+        key = (op, value, children, name)
+        with cls._intern_lock:
+            node = cls._interned.get(key)
+            if node is None:
+                node = super().__new__(cls)
+                node.op = op
+                node.value = value
+                node.children = children
+                node.name = name
+                node._memo = {}  # результаты вычислений, привязанные к узлу
+                cls._interned[key] = node
+        return node
+
+    def __reduce__(self):
+        # При распаковке узел снова проходит через интернирование
+        return RegexNode, (self.op, self.value, self.children, self.name)
+
+    def memo(self, key: str, compute: Callable[['RegexNode'], Any]) -> Any:
+        """Возвращает результат compute(self), вычисляя его не более одного раза на узел."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = compute(self)
+            return value
+
+    def seen(self) -> bool:
+        """Отмечает обращение к узлу; True — если к нему уже обращались раньше."""
+        seen = 'seen' in self._memo
+        self._memo['seen'] = True
+        return seen
 
     def __repr__(self, level=0):
         indent = '  ' * level
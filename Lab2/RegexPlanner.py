@@ -0,0 +1,135 @@
+from RegexNode import RegexOp, RegexNode
+from RegexPositions import positions
+from RegexDFA import accepts_dfa, find_dfa, minimize_dfa, accelerate_dfa
+from RegexFollowpos import followpos_to_dfa
+from RegexBudget import Budget, BudgetExceeded
+from RegexGlushkov import BitParallelMatcher, MAX_POSITIONS
+from RegexLiteral import literal_of, literal_set, LiteralEngine, MultiLiteralEngine
+from RegexStdlib import StdlibEngine, unsupported, to_re
+import RegexDerivatives
+
+MAX_DFA_STATES = 2000  # больше состояний — полный ДКА строить не выгодно, берём ленивый
+
+
+class EnginePlan:
+    """
+    Решение планировщика: какой движок обслуживает выражение и почему.
+    - engine: "literal" | "literals" | "dfa" | "bitparallel" | "lazy_dfa" | "nfa"
+    - reasons: объяснения в порядке проверки
+    - features: результаты анализа дерева; features["stdlib"] — шаблон re, если
+      автоматным движкам (dfa, bitparallel, lazy_dfa) помогает стандартный re;
+      features["stdlib_shortest"] — ленивый шаблон, если границы поиска даёт сам re
+    """
+
+    def __init__(self, engine, reasons, features):
+        self.engine = engine
+        self.reasons = reasons
+        self.features = features
+
+    def to_dict(self):
+        return {"engine": self.engine, "reasons": list(self.reasons), "features": dict(self.features)}
+
+    def __str__(self):
+        return f"Plan(engine: {self.engine}, reasons: {'; '.join(self.reasons)})"
+
+
+def _walk(node: RegexNode):
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        yield item
+        stack.extend(item.children)
+
+
+def analyze(node: RegexNode) -> dict:
+    """Признаки выражения, по которым выбирается движок."""
+    features = {"has_refs": False, "has_groups": False, "max_repeat": 0}
+    for item in _walk(node):
+        if item.op == RegexOp.NAMED_REF:
+            features["has_refs"] = True
+        elif item.op == RegexOp.NAMED_GROUP:
+            features["has_groups"] = True
+        elif item.op == RegexOp.REPEAT:
+            features["max_repeat"] = max(features["max_repeat"], item.value)
+    features["literal"] = None if features["has_groups"] else literal_of(node)
+    features["literals"] = None
+    if features["literal"] is None and not features["has_groups"]:
+        words = literal_set(node)
+        features["literals"] = len(words) if words is not None else None
+    if not features["has_refs"]:
+        features["positions"] = len(positions(node))
+        features["nullable"] = positions(node).nullable
+    return features
+
+
+# Движки с общим интерфейсом: accepts(string) -> bool, find(string, pos) -> (начало, конец) | None
+
+class DFAEngine:
+    def __init__(self, dfa):
+        self.dfa = dfa
+
+    def accepts(self, string):
+        return accepts_dfa(self.dfa, string)
+
+    def find(self, string, pos=0):
+        return find_dfa(self.dfa, string, pos)
+
+
+def _with_stdlib(node, engine_plan, engine):
+    # Выражение, которое re исполняет без риска экспоненциального бэктрекинга,
+    # сопоставляется на C: fullmatch для match и re.search для поиска — целиком
+    # или как быстрый поиск начала
+    reason = unsupported(node)
+    engine_plan.features["stdlib"] = None if reason else to_re(node)
+    engine_plan.features["stdlib_shortest"] = None
+    if reason:
+        engine_plan.reasons.append(f"stdlib re not used: {reason}")
+        return engine_plan, engine
+    engine_plan.reasons.append(f"lowered to stdlib re {engine_plan.features['stdlib']!r}")
+    stdlib = StdlibEngine(node, engine)
+    if stdlib.shortest is not None:
+        engine_plan.features["stdlib_shortest"] = stdlib.shortest_pattern
+        engine_plan.reasons.append(f"search spans come from lazy re {stdlib.shortest_pattern!r}")
+    return engine_plan, stdlib
+
+
+def plan(node: RegexNode, budget=None):
+    """
+    Анализирует дерево и возвращает (EnginePlan, движок или None для НКА).
+    budget ограничивает построение полного ДКА (по умолчанию — MAX_DFA_STATES состояний).
+    """
+    if budget is None:
+        budget = Budget(max_states=MAX_DFA_STATES)
+    features = analyze(node)
+    reasons = []
+
+    if features["has_refs"]:
+        reasons.append("back-references need the NFA with captures")
+        return EnginePlan("nfa", reasons, features), None
+
+    if features["literal"] is not None:
+        reasons.append("pattern is a plain literal")
+        return EnginePlan("literal", reasons, features), LiteralEngine(features["literal"])
+
+    if features["literals"] is not None:
+        reasons.append(f"pattern is an alternation of {features['literals']} literals")
+        return EnginePlan("literals", reasons, features), MultiLiteralEngine(literal_set(node))
+
+    try:
+        dfa = minimize_dfa(followpos_to_dfa(node, budget), budget=budget)
+    except BudgetExceeded as exc:
+        features["budget_exceeded"] = str(exc)
+        reasons.append(f"full DFA does not fit the budget ({exc})")
+    else:
+        features["dfa_states"] = len(dfa.states)
+        features["accelerated_states"] = accelerate_dfa(dfa)
+        reasons.append(f"DFA fits the budget ({len(dfa.states)} states)")
+        return _with_stdlib(node, EnginePlan("dfa", reasons, features), DFAEngine(dfa))
+
+    if features["positions"] <= MAX_POSITIONS:
+        reasons.append(f"{features['positions']} positions fit the bit-parallel matcher")
+        return _with_stdlib(node, EnginePlan("bitparallel", reasons, features), BitParallelMatcher(node))
+
+    reasons.append(f"{features['positions']} positions are too many for bit-parallel matching")
+    engine = RegexDerivatives.DerivativeDFA(RegexDerivatives.from_ast(node))
+    return _with_stdlib(node, EnginePlan("lazy_dfa", reasons, features), engine)
@@ -0,0 +1,107 @@
+from RegexNode import RegexOp, RegexNode
+
+
+class Positions:
+    """
+    Позиционное описание выражения (nullable / firstpos / lastpos / followpos).
+    Позиция — это вхождение символа (узла CHAR) в выражение; позиции нумеруются
+    слева направо с нуля внутри поддерева, множества позиций хранятся битовыми масками:
+    - symbols: символ каждой позиции
+    - nullable: принимает ли выражение пустую строку
+    - first: позиции, с которых может начинаться слово
+    - last: позиции, которыми может заканчиваться слово
+    - follow: follow[p] — позиции, которые могут идти сразу после позиции p
+    Нумерация относительная, поэтому результат не зависит от того, где поддерево
+    находится в большом выражении, и кешируется прямо в интернированном узле.
+    """
+
+    __slots__ = ('symbols', 'nullable', 'first', 'last', 'follow')
+
+    def __init__(self, symbols, nullable, first, last, follow):
+        self.symbols = symbols
+        self.nullable = nullable
+        self.first = first
+        self.last = last
+        self.follow = follow
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+EMPTY = Positions((), True, 0, 0, ())
+
+
+def iter_bits(mask: int):
+    """Перебирает номера установленных битов маски по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _concat(parts) -> Positions:
+    symbols, follow = [], []
+    nullable, first, last = True, 0, 0
+    for part in parts:
+        offset = len(symbols)
+        part_first = part.first << offset
+        for p in iter_bits(last):
+            follow[p] |= part_first
+        symbols.extend(part.symbols)
+        follow.extend(mask << offset for mask in part.follow)
+        if nullable:
+            first |= part_first
+        last = (part.last << offset) | (last if part.nullable else 0)
+        nullable = nullable and part.nullable
+    return Positions(tuple(symbols), nullable, first, last, tuple(follow))
+
+
+def _alt(parts) -> Positions:
+    symbols, follow = [], []
+    nullable, first, last = False, 0, 0
+    for part in parts:
+        offset = len(symbols)
+        symbols.extend(part.symbols)
+        follow.extend(mask << offset for mask in part.follow)
+        first |= part.first << offset
+        last |= part.last << offset
+        nullable = nullable or part.nullable
+    return Positions(tuple(symbols), nullable, first, last, tuple(follow))
+
+
+def _loop(inner: Positions) -> Positions:
+    follow = list(inner.follow)
+    for p in iter_bits(inner.last):
+        follow[p] |= inner.first
+    return Positions(inner.symbols, True, inner.first, inner.last, tuple(follow))
+
+
+def _compute(node: RegexNode) -> Positions:
+    match node.op:
+        case RegexOp.CHAR:
+            return Positions((node.value,), False, 1, 1, (0,))
+        case RegexOp.CONCAT:
+            return _concat([positions(child) for child in node.children])
+        case RegexOp.ALT:
+            return _alt([positions(child) for child in node.children])
+        case RegexOp.KLEENE:
+            return _loop(positions(node.children[0]))
+        case RegexOp.OPTIONAL:
+            inner = positions(node.children[0])
+            return Positions(inner.symbols, True, inner.first, inner.last, inner.follow)
+        case RegexOp.REPEAT:
+            if node.value == 0:
+                return EMPTY
+            return _concat([positions(node.children[0])] * node.value)
+        case RegexOp.GROUP | RegexOp.NAMED_GROUP:
+            # Захваты на язык не влияют
+            return positions(node.children[0])
+        case RegexOp.NAMED_REF:
+            raise ValueError(f"Named reference <{node.name}> is not supported by position automata")
+        case _:
+            raise ValueError(f"Unknown operation: {node.op}")
+
+
+def positions(node: RegexNode) -> Positions:
+    """Позиционное описание узла; вычисляется один раз на интернированный узел."""
+    return node.memo('positions', _compute)
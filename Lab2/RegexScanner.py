@@ -0,0 +1,100 @@
+from RegexLexer import RegexLexer
+from RegexParser import RegexParser
+from RegexNFA import State, NFA, NFAConstructor
+from RegexDFA import nfa_to_dfa, minimize_dfa
+
+
+class ScanToken:
+    def __init__(self, type_: str, value: str, start: int, end: int):
+        self.type = type_     # имя правила
+        self.value = value    # распознанный текст
+        self.start = start    # позиция начала во входной строке
+        self.end = end        # позиция конца
+
+    def __eq__(self, other):
+        return (isinstance(other, ScanToken) and
+                (self.type, self.value, self.start, self.end) == (other.type, other.value, other.start, other.end))
+
+    def __repr__(self):
+        return f"{self.type}({self.value!r}, {self.start})"
+
+
+class Scanner:
+    """
+    Табличный сканер: один минимальный ДКА для всех правил.
+    accept: {состояние ДКА: имя токена} для принимающих состояний.
+    """
+
+    def __init__(self, dfa, accept, ignore=()):
+        self.dfa = dfa
+        self.accept = accept
+        self.ignore = frozenset(ignore)
+
+    def longest(self, text, pos):
+        """Самый длинный токен, начинающийся в pos: (имя, конец) или (None, pos)."""
+        state = self.dfa.start
+        best_type, best_end = None, pos
+        for i in range(pos, len(text)):
+            state = state.transitions.get(text[i])
+            if state is None:
+                break
+            token_type = self.accept.get(state)
+            if token_type is not None:
+                best_type, best_end = token_type, i + 1
+        return best_type, best_end
+
+    def tokens(self, text):
+        """Генератор токенов по принципу максимального совпадения (maximal munch)."""
+        pos = 0
+        while pos < len(text):
+            token_type, end = self.longest(text, pos)
+            if token_type is None:
+                raise ValueError(f"Illegal character {text[pos]!r} at position {pos}")
+            if token_type not in self.ignore:
+                yield ScanToken(token_type, text[pos:end], pos, end)
+            pos = end
+
+
+class ScannerGenerator:
+    """
+    Строит сканер по списку правил (имя токена, регулярное выражение).
+    НКА правил объединяются через общее начальное состояние, конец каждого
+    правила помечается его приоритетом (порядковым номером), затем строится
+    один ДКА и минимизируется с учётом меток. Если самое длинное совпадение
+    подходит под несколько правил, побеждает объявленное раньше.
+    """
+
+    def __init__(self, rules=(), ignore=()):
+        self.rules = []
+        self.ignore = set(ignore)
+        for name, pattern in rules:
+            self.add_rule(name, pattern)
+
+    def add_rule(self, name: str, pattern: str):
+        self.rules.append((name, pattern))
+        return self
+
+    def build(self) -> Scanner:
+        if not self.rules:
+            raise ValueError("Scanner needs at least one rule")
+        start = State()
+        priority = {}  # конечное состояние НКА правила -> номер правила
+        for index, (name, pattern) in enumerate(self.rules):
+            ast = RegexParser(RegexLexer(pattern).lex()).parse()
+            rule_nfa = NFAConstructor().build(ast)
+            start.add_transition('ε', rule_nfa.start)
+            priority[rule_nfa.end] = index
+
+        dfa = nfa_to_dfa(NFA(start, State()))
+
+        def rule_of(state):
+            ranks = [priority[s] for s in state.nfa_states if s in priority]
+            return min(ranks) if ranks else None
+
+        min_dfa = minimize_dfa(dfa, key=rule_of)
+        accept = {}
+        for state in min_dfa.states:
+            index = rule_of(state)
+            if index is not None:
+                accept[state] = self.rules[index][0]
+        return Scanner(min_dfa, accept, self.ignore)
@@ -0,0 +1,197 @@
+import json
+import struct
+from array import array
+from multiprocessing import shared_memory
+from RegexMatch import MatchResult, leftmost_shortest, iter_spans
+from RegexBytes import DEAD
+
+# Разметка блока разделяемой памяти:
+#   заголовок   — магия, число состояний, число классов, длина карты классов
+#   карта       — JSON-список строк: i-я строка — символы i-го класса
+#   таблица     — int32 [состояние * классов + класс] -> состояние (DEAD — нет перехода),
+#                 выровнена на 8 байт; состояние 0 — стартовое
+#   принимающие — битовая карта, бит s — принимает ли состояние s
+MAGIC = b'RXDF'
+_HEADER = struct.Struct('<4sIII')
+
+
+def _align(offset, to=8):
+    return (offset + to - 1) // to * to
+
+
+def _layout(states, classes, map_size):
+    table = _align(_HEADER.size + map_size)
+    accepting = table + 4 * states * classes
+    return table, accepting, accepting + (states + 7) // 8
+
+
+def _flatten(dfa):
+    """
+    Плоская таблица ДКА: символы с одинаковыми столбцами переходов
+    (ни одно состояние их не различает) объединяются в один класс.
+    """
+    number = {dfa.start: 0}
+    order = [dfa.start]
+    for state in order:  # обход в ширину, order растёт по ходу
+        for target in state.transitions.values():
+            if target not in number:
+                number[target] = len(order)
+                order.append(target)
+    columns = {}
+    for symbol in sorted({s for state in order for s in state.transitions}):
+        column = tuple(number[state.transitions[symbol]] if symbol in state.transitions else DEAD
+                       for state in order)
+        columns.setdefault(column, []).append(symbol)
+    classes = [''.join(symbols) for symbols in columns.values()]
+    table = array('i', [DEAD]) * (len(order) * len(classes))
+    for cls, column in enumerate(columns):
+        for state, target in enumerate(column):
+            table[state * len(classes) + cls] = target
+    accepting = bytearray((len(order) + 7) // 8)
+    for i, state in enumerate(order):
+        if state.is_end:
+            accepting[i >> 3] |= 1 << (i & 7)
+    return len(order), classes, table, accepting
+
+
+def _open(name):
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # До Python 3.13 подключение регистрирует блок в resource_tracker. Процессы,
+        # запущенные создателем через multiprocessing, делят с ним один трекер, и
+        # повторная регистрация ничего не меняет; независимый процесс со своим трекером
+        # при завершении удалит блок — для такого сценария нужен Python 3.13+
+        return shared_memory.SharedMemory(name)
+
+
+class SharedDFA:
+    """
+    ДКА в блоке multiprocessing.shared_memory: плоская таблица переходов,
+    карта классов символов и битовая карта принимающих состояний.
+    Создатель вызывает export, рабочие процессы — attach по имени: таблица
+    читается прямо из общей памяти (memoryview без копирования), в каждом
+    процессе декодируется только карта классов размером с алфавит.
+    Сам объект сериализуется одним именем блока, поэтому его можно
+    передавать в ProcessPoolExecutor вместо графа DFAState (pickle графа
+    глубиной в тысячи состояний упирается в предел рекурсии); в процессе
+    получателя блок подключается один раз и дальше переиспользуется.
+    Блок живёт, пока создатель не вызовет unlink; close освобождает
+    отображение в текущем процессе.
+    """
+
+    def __init__(self, block, owner):
+        self.block = block
+        self.owner = owner
+        magic, self.n_states, self.n_classes, map_size = _HEADER.unpack_from(block.buf)
+        if magic != MAGIC:
+            block.close()
+            raise ValueError(f"shared memory block {block.name!r} does not hold a DFA")
+        table, accepting, end = _layout(self.n_states, self.n_classes, map_size)
+        classes = json.loads(bytes(block.buf[_HEADER.size:_HEADER.size + map_size]))
+        self.classes = {symbol: cls for cls, symbols in enumerate(classes) for symbol in symbols}
+        self.table = block.buf[table:accepting].cast('i')
+        self.accepting = block.buf[accepting:end]
+
+    @classmethod
+    def export(cls, value, name=None) -> 'SharedDFA':
+        """
+        Новый блок с ДКА value: DFA или скомпилированный ДКА (берётся min_dfa).
+        name — имя блока, по умолчанию выбирается системой.
+        """
+        dfa = value.min_dfa if hasattr(value, 'min_dfa') else value
+        states, classes, table, accepting = _flatten(dfa)
+        class_map = json.dumps(classes).encode('utf-8')
+        table_at, accepting_at, size = _layout(states, len(classes), len(class_map))
+        block = shared_memory.SharedMemory(name, create=True, size=size)
+        _HEADER.pack_into(block.buf, 0, MAGIC, states, len(classes), len(class_map))
+        block.buf[_HEADER.size:_HEADER.size + len(class_map)] = class_map
+        block.buf[table_at:accepting_at] = table.tobytes()
+        block.buf[accepting_at:size] = accepting
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name) -> 'SharedDFA':
+        """Подключение к блоку, созданному export (в этом или другом процессе)."""
+        return cls(_open(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.block.name
+
+    def __reduce__(self):
+        return _attached, (self.name,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.block.unlink()
+
+    def close(self):
+        """Освободить отображение блока в этом процессе; сам блок остаётся."""
+        if self.table is not None:
+            self.table.release()
+            self.accepting.release()
+            self.table = self.accepting = None
+            self.block.close()
+
+    def unlink(self):
+        """Удалить блок из системы (вызывает создатель, когда блок больше не нужен)."""
+        self.block.unlink()
+
+    def is_accepting(self, state) -> bool:
+        return bool(self.accepting[state >> 3] >> (state & 7) & 1)
+
+    def accepts(self, string) -> bool:
+        table, classes, width = self.table, self.classes, self.n_classes
+        state = 0
+        for char in string:
+            cls = classes.get(char)
+            if cls is None:
+                return False
+            state = table[state * width + cls]
+            if state == DEAD:
+                return False
+        return self.is_accepting(state)
+
+    def match(self, string):
+        return MatchResult(string, 0, len(string)) if self.accepts(string) else None
+
+    def _shortest_end(self, string, start):
+        table, classes, width, accepting = self.table, self.classes, self.n_classes, self.accepting
+        state = 0
+        for pos in range(start, len(string)):
+            cls = classes.get(string[pos])
+            if cls is None:
+                return -1
+            state = table[state * width + cls]
+            if state == DEAD:
+                return -1
+            if accepting[state >> 3] >> (state & 7) & 1:
+                return pos + 1
+        return -1
+
+    def find(self, string, pos=0):
+        """Самое левое, а среди них кратчайшее непустое вхождение: (начало, конец) или None."""
+        return leftmost_shortest(self._shortest_end, string, pos)
+
+    def search(self, string, pos=0):
+        span = self.find(string, pos)
+        return MatchResult(string, *span) if span is not None else None
+
+    def finditer(self, string):
+        for span in iter_spans(self.find, string):
+            yield MatchResult(string, *span)
+
+
+_cache = {}  # имя блока -> SharedDFA, подключённый в этом процессе при распаковке
+
+
+def _attached(name):
+    shared = _cache.get(name)
+    if shared is None or shared.table is None:
+        shared = _cache[name] = SharedDFA.attach(name)
+    return shared
@@ -0,0 +1,78 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class CompileStats:
+    """
+    Статистика компиляции регулярного выражения и (опционально) профиль выполнения.
+    Содержит:
+    - stages: {этап: время выполнения в секундах}
+    - sizes: {автомат: {"states": число состояний, "transitions": число переходов}}
+    - profiling: собираются ли счётчики во время match/search
+    - state_visits: {имя состояния: число посещений}
+    - transition_counts: {(из, символ, в): число срабатываний перехода}
+    """
+
+    def __init__(self, profiling=False):
+        self.profiling = profiling
+        self.stages = {}
+        self.sizes = {}
+        self.state_visits = {}
+        self.transition_counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Замеряет время выполнения этапа компиляции."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - started
+
+    def record_size(self, name, states):
+        """Запоминает размер автомата по списку его состояний."""
+        transitions = 0
+        for state in states:
+            for target in state.transitions.values():
+                # У НКА по символу может быть несколько целей, у ДКА — ровно одна
+                transitions += len(target) if isinstance(target, list) else 1
+            transitions += len(getattr(state, 'epsilon', ()))
+        self.sizes[name] = {"states": len(states), "transitions": transitions}
+
+    def visit(self, state):
+        self.state_visits[state.name] = self.state_visits.get(state.name, 0) + 1
+
+    def transition(self, source, symbol, target):
+        key = (source.name, symbol, target.name)
+        self.transition_counts[key] = self.transition_counts.get(key, 0) + 1
+
+    def reset_profile(self):
+        """Сбрасывает счётчики профиля, сохраняя статистику компиляции."""
+        self.state_visits = {}
+        self.transition_counts = {}
+
+    def hot_states(self, limit=10):
+        """Самые посещаемые состояния: [(имя, число посещений), ...]."""
+        ranked = sorted(self.state_visits.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def to_dict(self):
+        return {
+            "stages": dict(self.stages),
+            "sizes": {name: dict(size) for name, size in self.sizes.items()},
+            "profiling": self.profiling,
+            "state_visits": dict(self.state_visits),
+            "transition_counts": [
+                {"from": source, "symbol": symbol, "to": target, "count": count}
+                for (source, symbol, target), count in self.transition_counts.items()
+            ],
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    def __str__(self):
+        stages = ", ".join(f"{name}: {seconds * 1000:.3f} ms" for name, seconds in self.stages.items())
+        sizes = ", ".join(f"{name}: {size['states']} states" for name, size in self.sizes.items())
+        return f"Stats(stages: [{stages}], sizes: [{sizes}])"
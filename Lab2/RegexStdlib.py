@@ -0,0 +1,236 @@
+import re
+from RegexNode import RegexOp, RegexNode
+
+MAX_AMBIGUOUS_OPTIONALS = 8  # каждый неоднозначный ? удваивает число путей, которые может перебрать re
+
+# Приоритеты для расстановки скобок: чем больше, тем сильнее связывает
+_ALT, _CONCAT, _ATOM = 0, 1, 2
+
+
+def unsupported(node: RegexNode):
+    """
+    Причина, по которой дерево не переводится в стандартный re, или None.
+    - ссылки на группы: у re (?P=name) повторяет текст, а не выражение группы
+    - повторяющиеся и не являющиеся идентификаторами имена групп re не принимает
+    - вложенные квантификаторы и квантификаторы над альтернативами со сложными
+      ветвями: бэктрекинг re на них может работать экспоненциально долго,
+      поэтому под квантификатором допускаются только символы, классы символов
+      (альтернатива одиночных символов) и их конкатенации
+    - неоднозначные квантификаторы (см. _ambiguity)
+    """
+    names = set()
+    stack = [(node, False)]
+    while stack:
+        item, quantified = stack.pop()
+        if item.op == RegexOp.NAMED_REF:
+            return f"group reference <{item.name}>"
+        if item.op == RegexOp.NAMED_GROUP:
+            if not item.name.isidentifier():
+                return f"group name {item.name!r} is not a Python identifier"
+            if item.name in names:
+                return f"duplicate group name {item.name!r}"
+            names.add(item.name)
+        if item.op in (RegexOp.KLEENE, RegexOp.OPTIONAL, RegexOp.REPEAT):
+            if quantified:
+                return "nested quantifiers"
+            quantified = True
+        if quantified and item.op == RegexOp.ALT and \
+                any(_unwrap(child).op != RegexOp.CHAR for child in item.children):
+            return "quantified alternation of non-single characters"
+        stack.extend((child, quantified) for child in item.children)
+    return _ambiguity(node)
+
+
+def _ambiguity(node):
+    """
+    Неоднозначность квантификаторов одной последовательности: два квантификатора
+    с общими символами, между которыми стоят лишь части, способные совпасть со
+    строкой из этих общих символов (a…a…, a…(a|b)a…, (a…|b)a…). Тогда одну серию
+    символов можно по-разному поделить между ними, и re перебирает все деления:
+    для двух замыканий — степень длины строки, поэтому такие выражения не
+    переводятся; для ? — вдвое больше путей на каждый, поэтому допускается не
+    больше MAX_AMBIGUOUS_OPTIONALS. Сколько бы ни было замыканий над
+    непересекающимися символами (a…b…, a…xa…), неоднозначности нет.
+    """
+    optionals = set()
+    for number, items in enumerate(_sequences(node)):
+        found = [(i, q) for i, item in enumerate(items) for q in _quantifiers(item)]
+        for k, (i, first) in enumerate(found):
+            for j, second in found[k + 1:]:
+                if i == j or first.op != second.op:
+                    continue  # замыкание и ? рядом дают лишь линейный перебор
+                common = _chars(first) & _chars(second)
+                if not common or not all(_matches_over(item, common) for item in items[i + 1:j]):
+                    continue
+                if first.op == RegexOp.KLEENE:
+                    return "ambiguous closures (re backtracking grows as a power of the input length)"
+                optionals.update(((number, i), (number, j)))
+    if len(optionals) > MAX_AMBIGUOUS_OPTIONALS:
+        return f"{len(optionals)} ambiguous optional parts"
+    return None
+
+
+def _items(node):
+    """Элементы конкатенации; группы и вложенные конкатенации раскрываются."""
+    node = _unwrap(node)
+    if node.op != RegexOp.CONCAT:
+        return [node]
+    return [item for child in node.children for item in _items(child)]
+
+
+def _sequences(node):
+    """Последовательности элементов всего дерева: сама конкатенация и ветви альтернатив в ней."""
+    items = _items(node)
+    yield items
+    for item in items:
+        if item.op == RegexOp.ALT:
+            for child in item.children:
+                yield from _sequences(child)
+
+
+def _quantifiers(node):
+    """Замыкания и ? в поддереве (внутрь квантификатора не заходим — вложенность уже отвергнута)."""
+    if node.op in (RegexOp.KLEENE, RegexOp.OPTIONAL):
+        return [node]
+    return [q for child in node.children for q in _quantifiers(child)]
+
+
+def _chars(node):
+    return node.memo('chars', lambda n: frozenset([n.value]) if n.op == RegexOp.CHAR
+                     else frozenset().union(*map(_chars, n.children)))
+
+
+def _matches_over(node, chars):
+    """Может ли поддерево совпасть с какой-нибудь строкой из символов chars."""
+    match node.op:
+        case RegexOp.CHAR:
+            return node.value in chars
+        case RegexOp.CONCAT:
+            return all(_matches_over(child, chars) for child in node.children)
+        case RegexOp.ALT:
+            return any(_matches_over(child, chars) for child in node.children)
+        case RegexOp.KLEENE | RegexOp.OPTIONAL:
+            return True
+        case RegexOp.REPEAT:
+            return node.value == 0 or _matches_over(node.children[0], chars)
+        case _:
+            return _matches_over(node.children[0], chars)
+
+
+def _unwrap(node):
+    while node.op in (RegexOp.GROUP, RegexOp.NAMED_GROUP):
+        node = node.children[0]
+    return node
+
+
+def to_re(node: RegexNode, lazy=False) -> str:
+    """
+    Эквивалентный шаблон для модуля re: символы экранируются, … становится *,
+    (<name>r) — (?P<name>r), {n} и ? переносятся как есть. Перед вызовом
+    стоит проверить unsupported(node). lazy=True — ленивые *? и ?? (см. shortest_re).
+    """
+    return node.memo('stdlib_re_lazy' if lazy else 'stdlib_re', lambda n: _lower(n, lazy)[0])
+
+
+def shortest_re(node: RegexNode):
+    """
+    Шаблон re, у которого re.search сразу даёт самое левое, затем кратчайшее
+    непустое вхождение, или None. Так бывает, когда выражение не принимает
+    пустую строку, альтернативы в нём — только классы символов, а переменную
+    длину даёт не больше одного квантификатора: с ленивыми *? и ?? re перебирает
+    его повторения от меньшего числа к большему, и первое найденное совпадение
+    самое короткое. При нескольких квантификаторах ленивый перебор идёт по их
+    числам повторений по очереди, а не по общей длине, и кратчайшим быть не обязан.
+    """
+    quantifiers = [q for items in _sequences(node) for item in items for q in _quantifiers(item)]
+    if len(quantifiers) > 1 or _nullable(node) or not _only_classes(node):
+        return None
+    return to_re(node, lazy=True)
+
+
+def _nullable(node):
+    match node.op:
+        case RegexOp.CHAR:
+            return False
+        case RegexOp.CONCAT:
+            return all(map(_nullable, node.children))
+        case RegexOp.ALT:
+            return any(map(_nullable, node.children))
+        case RegexOp.KLEENE | RegexOp.OPTIONAL:
+            return True
+        case RegexOp.REPEAT:
+            return node.value == 0 or _nullable(node.children[0])
+        case _:
+            return _nullable(node.children[0])
+
+
+def _only_classes(node):
+    if node.op == RegexOp.ALT and any(_unwrap(child).op != RegexOp.CHAR for child in node.children):
+        return False
+    return all(map(_only_classes, node.children))
+
+
+def _lower(node, lazy=False):
+    """Пара (шаблон, приоритет)."""
+    match node.op:
+        case RegexOp.CHAR:
+            return re.escape(node.value), _ATOM
+        case RegexOp.CONCAT:
+            return ''.join(_wrap(child, _CONCAT, lazy) for child in node.children), _CONCAT
+        case RegexOp.ALT:
+            return '|'.join(_wrap(child, _ALT, lazy) for child in node.children), _ALT
+        case RegexOp.KLEENE:
+            return _wrap(node.children[0], _ATOM, lazy) + ('*?' if lazy else '*'), _ATOM
+        case RegexOp.OPTIONAL:
+            return _wrap(node.children[0], _ATOM, lazy) + ('??' if lazy else '?'), _ATOM
+        case RegexOp.REPEAT:
+            return _wrap(node.children[0], _ATOM, lazy) + f'{{{node.value}}}', _ATOM
+        case RegexOp.GROUP:
+            return _lower(node.children[0], lazy)
+        case RegexOp.NAMED_GROUP:
+            return f'(?P<{node.name}>{_lower(node.children[0], lazy)[0]})', _ATOM
+        case _:
+            raise ValueError(f"Cannot lower {node.op} to re")
+
+
+def _wrap(node, level, lazy=False):
+    pattern, precedence = _lower(node, lazy)
+    if precedence < level:
+        return f'(?:{pattern})'
+    if level == _ATOM and pattern.endswith(('*', '?', '}')):
+        return f'(?:{pattern})'  # a** и a?{2} в re — ошибка или ленивый квантификатор
+    return pattern
+
+
+class StdlibEngine:
+    """
+    Движок на скомпилированном re (сопоставление на C) поверх движка планировщика.
+    accepts — re.fullmatch: язык шаблона тот же, что у выражения.
+    find — самое левое, затем кратчайшее непустое вхождение, как у остальных движков.
+    Если такое вхождение даёт ленивый шаблон (shortest_re), границы целиком
+    находит re.search. Иначе re.search быстро находит первую позицию, с которой
+    начинается хоть какое-то совпадение (левее не начинается ни одно), а границы
+    от неё ищет inner.find — у re другие правила выбора конца (жадность, порядок
+    альтернатив).
+    Захваты групп re тоже распределяет иначе, чем НКА, поэтому движок отвечает
+    только за допуск и границы, а группы на найденном отрезке строит НКА.
+    """
+
+    def __init__(self, node: RegexNode, inner):
+        self.pattern = to_re(node)
+        self.regex = re.compile(self.pattern)
+        self.shortest_pattern = shortest_re(node)
+        self.shortest = re.compile(self.shortest_pattern) if self.shortest_pattern is not None else None
+        self.inner = inner
+
+    def accepts(self, string):
+        return self.regex.fullmatch(string) is not None
+
+    def find(self, string, pos=0):
+        if self.shortest is not None:
+            found = self.shortest.search(string, pos)
+            return found.span() if found is not None else None
+        found = self.regex.search(string, pos)
+        if found is None:
+            return None
+        return self.inner.find(string, found.start())
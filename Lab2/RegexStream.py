@@ -0,0 +1,163 @@
+import asyncio
+import codecs
+from RegexMatch import MatchResult, iter_spans
+
+
+class StreamMatcher:
+    """
+    Потоковый поиск по ДКА: строка подаётся кусками через feed(chunk).
+    Находит те же совпадения, что и последовательные вызовы поиска: самое левое,
+    а среди них кратчайшее непустое вхождение, затем поиск продолжается с его конца.
+    Состояние ДКА переносится через границы кусков, совпадения отдаются с
+    абсолютными позициями, как только становится ясно, что левее ничего не найдётся.
+    Хранятся только символы, начиная с самого раннего ещё возможного совпадения;
+    число «потоков» (стартовых позиций в работе) не превышает числа состояний ДКА.
+    """
+
+    def __init__(self, dfa, step=None):
+        self.dfa = dfa
+        self.step = step       # step(состояние, символ) для ленивых ДКА (DerivativeDFA.step)
+        self.buffer = ''       # хвост входа, который ещё может понадобиться
+        self.offset = 0        # абсолютная позиция первого символа buffer
+        self.pos = 0           # абсолютная позиция следующего непрочитанного символа
+        self.threads = {}      # состояние ДКА -> самая ранняя позиция начала в нём
+        self.pending = None    # (начало, конец) лучшего найденного совпадения
+        self.closed = False
+
+    def feed(self, chunk: str) -> list[MatchResult]:
+        """Добавляет кусок входа и возвращает совпадения, завершившиеся в нём."""
+        if self.closed:
+            raise ValueError("StreamMatcher is closed")
+        self.buffer += chunk
+        matches = []
+        self._scan(matches, final=False)
+        self._trim()
+        return matches
+
+    def close(self) -> list[MatchResult]:
+        """Сообщает о конце входа и возвращает оставшиеся совпадения."""
+        if self.closed:
+            return []
+        matches = []
+        self._scan(matches, final=True)
+        self.closed = True
+        self.buffer = ''
+        self.offset = self.pos
+        self.threads = {}
+        return matches
+
+    def _scan(self, matches, final):
+        start_state = self.dfa.start
+        step = self.step
+        while True:
+            end = self.offset + len(self.buffer)
+            while self.pos < end:
+                char = self.buffer[self.pos - self.offset]
+                threads = self.threads
+                if self.pending is None and start_state not in threads:
+                    threads[start_state] = self.pos
+
+                stepped = {}
+                for state, start in threads.items():
+                    target = state.transitions.get(char) if step is None else step(state, char)
+                    if target is None:
+                        continue
+                    if target.is_end and (self.pending is None or start < self.pending[0]):
+                        self.pending = (start, self.pos + 1)
+                    if stepped.get(target, start) >= start:
+                        stepped[target] = start
+                self.pos += 1
+
+                if self.pending is None:
+                    self.threads = stepped
+                    continue
+                # Интересны только потоки, способные дать совпадение левее найденного
+                limit = self.pending[0]
+                self.threads = {state: start for state, start in stepped.items() if start < limit}
+                if not self.threads:
+                    self._emit(matches)
+
+            if final and self.pending is not None:
+                self._emit(matches)
+                continue
+            break
+
+    def _emit(self, matches):
+        start, end = self.pending
+        matches.append(MatchResult(self.buffer, start, end, offset=self.offset))
+        # Символы после конца совпадения могли быть прочитаны — просматриваем их заново
+        self.pending = None
+        self.threads = {}
+        self.pos = end
+
+    def _trim(self):
+        keep = self.pos
+        if self.threads:
+            keep = min(keep, min(self.threads.values()))
+        if self.pending is not None:
+            keep = min(keep, self.pending[0])
+        if keep > self.offset:
+            self.buffer = self.buffer[keep - self.offset:]
+            self.offset = keep
+
+
+class BufferedMatcher:
+    """
+    Интерфейс StreamMatcher для движков без ДКА (НКА со ссылками на группы):
+    вход копится целиком, совпадения отдаются при close.
+    find(string, pos) -> (начало, конец) | None — самое левое, затем кратчайшее вхождение.
+    """
+
+    def __init__(self, find):
+        self.find = find
+        self.chunks = []
+        self.closed = False
+
+    def feed(self, chunk: str) -> list[MatchResult]:
+        if self.closed:
+            raise ValueError("BufferedMatcher is closed")
+        self.chunks.append(chunk)
+        return []
+
+    def close(self) -> list[MatchResult]:
+        if self.closed:
+            return []
+        self.closed = True
+        string = ''.join(self.chunks)
+        self.chunks = []
+        return [MatchResult(string, *span) for span in iter_spans(self.find, string)]
+
+
+async def _chunks(source, chunk_size):
+    """Куски из asyncio.StreamReader (или любого объекта с async read) либо из async-итератора."""
+    if hasattr(source, 'read'):
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in source:
+            yield chunk
+
+
+async def afinditer(dfa, source, chunk_size=65536, encoding='utf-8'):
+    """
+    Асинхронный поиск всех вхождений в потоке: async for m in afinditer(dfa, reader).
+    dfa — ДКА или уже созданный сопоставитель с feed/close (StreamMatcher, BufferedMatcher).
+    Байтовые куски декодируются инкрементально (многобайтовый символ может
+    быть разрезан границей куска), строковые подаются как есть.
+    Между кусками управление возвращается циклу событий.
+    """
+    matcher = dfa if hasattr(dfa, 'feed') else StreamMatcher(dfa)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    async for chunk in _chunks(source, chunk_size):
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = decoder.decode(chunk)
+        for match in matcher.feed(chunk):
+            yield match
+        await asyncio.sleep(0)
+    for match in matcher.feed(decoder.decode(b'', final=True)):
+        yield match
+    for match in matcher.close():
+        yield match
@@ -0,0 +1,84 @@
+from RegexDFA import DFA, DFAState
+
+
+class WordListBuilder:
+    """
+    Инкрементальное построение минимального ациклического ДКА по словарю
+    (Daciuk, Mihov, Watson, Watson, 2000) — без НКА и метода подмножеств.
+    Слова добавляются в лексикографическом порядке. У последнего добавленного
+    слова хвост ещё может поменяться — эти состояния лежат в unchecked; как
+    только следующее слово уходит с их пути, они сливаются с равными из register
+    (равными считаются состояния с одинаковыми флагом и переходами).
+    Память — размер минимального автомата плюс длина одного слова.
+    """
+
+    def __init__(self):
+        self.root = DFAState("w0", frozenset())
+        self.root.is_end = False
+        self.register = {}    # сигнатура -> состояние
+        self.unchecked = []   # (родитель, символ, потомок) вдоль последнего слова
+        self.previous = None
+
+    def add(self, word: str):
+        if self.previous is not None:
+            if word == self.previous:
+                return
+            if word < self.previous:
+                raise ValueError(f"Words must be added in sorted order: {word!r} after {self.previous!r}")
+        common = 0
+        if self.previous is not None:
+            limit = min(len(word), len(self.previous))
+            while common < limit and word[common] == self.previous[common]:
+                common += 1
+        self._minimize(common)
+
+        node = self.unchecked[-1][2] if self.unchecked else self.root
+        for symbol in word[common:]:
+            child = DFAState("", frozenset())
+            child.is_end = False
+            node.transitions[symbol] = child
+            self.unchecked.append((node, symbol, child))
+            node = child
+        node.is_end = True
+        self.previous = word
+
+    def _minimize(self, down_to):
+        while len(self.unchecked) > down_to:
+            parent, symbol, child = self.unchecked.pop()
+            # Потомки child уже зарегистрированы, поэтому их id однозначно задают язык;
+            # слова идут по порядку, так что переходы и так добавлены по возрастанию символа
+            signature = (child.is_end, tuple((s, id(t)) for s, t in child.transitions.items()))
+            registered = self.register.get(signature)
+            if registered is not None:
+                parent.transitions[symbol] = registered
+            else:
+                self.register[signature] = child
+
+    def finish(self) -> DFA:
+        """Минимальный ДКА словаря; после вызова добавлять слова нельзя."""
+        self._minimize(0)
+        dfa = DFA()
+        dfa.start = self.root
+        dfa.states = [self.root]
+        seen = {self.root}
+        for state in dfa.states:  # обход в ширину, список растёт по ходу
+            for target in state.transitions.values():
+                if target not in seen:
+                    seen.add(target)
+                    target.name = f"w{len(dfa.states)}"
+                    dfa.states.append(target)
+        self.previous = None
+        self.unchecked = None
+        return dfa
+
+
+def build_word_dfa(words, assume_sorted=False) -> DFA:
+    """
+    Минимальный ДКА, принимающий ровно слова из words.
+    Несортированный (или неизвестно как упорядоченный) вход сортируется;
+    assume_sorted=True позволяет подать отсортированный поток, не держа его в памяти.
+    """
+    builder = WordListBuilder()
+    for word in (words if assume_sorted else sorted(set(words))):
+        builder.add(word)
+    return builder.finish()
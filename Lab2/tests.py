@@ -1,6 +1,28 @@
 import unittest
-from MyRegex import compile_dfa, compile_nfa, match_dfa, draw_dfa
+from MyRegex import compile_dfa, compile_nfa, compile_glushkov, compile_words, match_dfa, draw_dfa
+from RegexPositions import positions
+from RegexDFA import minimize_dfa, intersect_dfa, accelerate_dfa, accepts_dfa, find_dfa
+import RegexDerivatives
+from RegexScanner import ScannerGenerator
+from RegexCodegen import dfa_to_python
+from RegexEquivalence import dfa_is_empty
+from RegexBudget import Budget, BudgetExceeded, BudgetFallbackWarning
+from RegexStdlib import to_re, unsupported, shortest_re
+from RegexAlgebra import SetAlgebra
+from RegexAhoCorasick import AhoCorasick
+from RegexShared import SharedDFA
+from RegexMatch import leftmost_shortest, iter_spans
+import pickle
+import copy
+import MyRegex
 import random
+import re
+import itertools
+import timeit
+import time
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # Возможные символы для регулярных выражений
 characters = list("abcdefghijklmnopqrstuvwxyz")
@@ -159,5 +181,940 @@ class TestRandomRegex(unittest.TestCase):
         self.assertEqual(result.groups["x"], "b")  # Последнее присваивание
 
 
+class TestCompileStats(unittest.TestCase):
+
+    def test_stage_times_and_sizes(self):
+        dfa = compile_dfa("a(b|c)…", budget=Budget())  # без бюджета ДКА берётся из кеша узлов, без НКА
+        stats = dfa.stats.to_dict()
+        self.assertIn("nfa", stats["stages"])
+        self.assertIn("dfa", stats["stages"])
+        self.assertEqual(stats["sizes"]["dfa"]["states"], len(dfa.dfa.states))
+        self.assertEqual(stats["state_visits"], {})
+
+    def test_profiling_counts_visits(self):
+        dfa = compile_dfa("ab…", profile=True)
+        dfa.match("abbb")
+        self.assertEqual(sum(dfa.stats.state_visits.values()), 5)
+        self.assertEqual(sum(dfa.stats.transition_counts.values()), 4)
+        exported = json.loads(dfa.stats.to_json())
+        # Счётчики ведутся по минимальному ДКА: a -> (b…), b… -> b…
+        self.assertEqual(len(exported["transition_counts"]), 2)
+
+    def test_profiling_off_records_nothing(self):
+        nfa = compile_nfa("ab")
+        nfa.search("xxab")
+        self.assertEqual(nfa.stats.state_visits, {})
+        profiled = compile_nfa("ab", profile=True)
+        profiled.search("xxab")
+        self.assertGreater(len(profiled.stats.state_visits), 0)
+
+
+class TestHashConsing(unittest.TestCase):
+
+    def test_equal_subtrees_are_interned(self):
+        first = compile_nfa("(ab|c)…x")
+        second = compile_nfa("(ab|c)…y")
+        self.assertIs(first.ast.children[0], second.ast.children[0])
+        self.assertIsNot(first.ast, second.ast)
+
+    def test_nfa_template_shared_between_patterns(self):
+        first = compile_dfa("(ab|c)…x")
+        shared = first.ast.children[0]
+        template = shared._memo["nfa_template"]
+        second = compile_dfa("(ab|c)…y")
+        self.assertIs(second.ast.children[0]._memo["nfa_template"], template)
+        self.assertIsNotNone(second.match("ababcy"))
+        self.assertIsNone(second.match("ababcx"))
+
+    def test_dfa_cached_per_node(self):
+        first = compile_dfa("(ab|c)…xy")
+        head = first.ast._memo["concat_split"].children[0]
+        second = compile_dfa("(ab|c)…xz")
+        self.assertIs(second.ast._memo["concat_split"].children[0], head)
+        self.assertIsNot(first.min_dfa, head._memo["min_dfa"])  # у объекта своя копия
+        self.assertTrue(second.match("ababcxz"))
+        self.assertFalse(second.match("ababcxy"))
+
+    def test_family_compiles_faster_with_dfa_cache(self):
+        # Общая часть — словарь из 24 слов под звёздочкой, у каждого выражения свой хвост
+        shared = "(" + "|".join("".join(word) for word in itertools.permutations("abcd")) + ")…"
+        family = [shared + "".join(word) for word in itertools.product("xyz", repeat=5)][:100]
+
+        def compile_family(budget):
+            compiled = [compile_dfa(pattern, budget=budget) for pattern in family]
+            for dfa in compiled:
+                dfa.min_dfa
+            return compiled
+
+        start = time.perf_counter()
+        plain = compile_family(Budget())  # с бюджетом кеш ДКА на узлах не используется
+        plain_time = time.perf_counter() - start
+        start = time.perf_counter()
+        cached = compile_family(None)
+        cached_time = time.perf_counter() - start
+        self.assertLess(cached_time, plain_time * 0.6)
+        for a, b in zip(plain[::10], cached[::10]):
+            self.assertTrue(a.equivalent(b))
+
+    def test_positions_are_memoized(self):
+        ast = compile_nfa("a(b|c)…d").ast
+        info = positions(ast)
+        self.assertIs(positions(ast), info)
+        self.assertEqual(info.symbols, ("a", "b", "c", "d"))
+        self.assertFalse(info.nullable)
+        self.assertEqual(info.follow[0], 0b1110)
+
+
+class TestDerivativesEngine(unittest.TestCase):
+
+    def test_matches_thompson_engine(self):
+        for _ in range(10):
+            regex = generate_random_regex(3)
+            thompson = compile_dfa(regex)
+            derivatives = compile_dfa(regex, engine="derivatives")
+            self.assertEqual(len(minimize_dfa(derivatives.dfa).states), len(thompson.min_dfa.states))
+            for text in ["", "a", "ab", "abc", "aaa", "xyz"]:
+                self.assertEqual(thompson.match(text) is None, derivatives.match(text) is None)
+
+    def test_lazy_states(self):
+        expr = RegexDerivatives.from_ast(compile_nfa("a(b|c)…d").ast)
+        lazy = RegexDerivatives.DerivativeDFA(expr)
+        self.assertEqual(len(lazy.dfa.states), 1)
+        self.assertIsNotNone(lazy.match("abcd"))
+        self.assertIsNone(lazy.match("abx"))
+        self.assertLessEqual(len(lazy.dfa.states), 3)
+
+    def test_native_complement_and_intersection(self):
+        dfa1 = compile_dfa("a(b|c)…", engine="derivatives")
+        dfa2 = compile_dfa("ab…", engine="derivatives")
+        complement = dfa1.complement_dfa()
+        self.assertIsNone(match_dfa(complement, "abc"))
+        self.assertIsNotNone(match_dfa(complement, "x"))
+        intersected = dfa1.intersect(dfa2)
+        self.assertIsNotNone(match_dfa(intersected, "abbb"))
+        self.assertIsNone(match_dfa(intersected, "ac"))
+
+
+class TestGlushkov(unittest.TestCase):
+
+    def test_agrees_with_dfa(self):
+        for _ in range(10):
+            regex = generate_random_regex(3)
+            dfa = compile_dfa(regex)
+            glushkov = compile_glushkov(regex)
+            for text in ["", "a", "ab", "abc", "aaa", "xyz"]:
+                self.assertEqual(dfa.match(text) is None, glushkov.match(text) is None)
+
+    def test_one_state_per_char(self):
+        glushkov = compile_glushkov("a(b|c)…d")
+        self.assertEqual(glushkov.matcher.automaton.size, 5)
+        self.assertFalse(glushkov.matcher.linear)
+        self.assertTrue(compile_glushkov("abc").matcher.linear)
+
+    def test_search(self):
+        glushkov = compile_glushkov("a(b|c)…d")
+        result = glushkov.search("zzzabbd")
+        self.assertEqual(result.full_match, "abbd")
+        self.assertEqual(result.start, 3)
+        self.assertIsNone(glushkov.search("zzzabb"))
+
+    def test_position_limit(self):
+        with self.assertRaises(ValueError):
+            compile_glushkov("a{65}")
+
+
+class TestFollowposDFA(unittest.TestCase):
+
+    def test_agrees_with_thompson(self):
+        for _ in range(10):
+            regex = generate_random_regex(3)
+            thompson = compile_dfa(regex)
+            direct = compile_dfa(regex, engine="followpos")
+            self.assertIsNone(direct.nfa)
+            self.assertEqual(len(minimize_dfa(direct.dfa).states), len(thompson.min_dfa.states))
+            for text in ["", "a", "ab", "abc", "aaa", "xyz"]:
+                self.assertEqual(thompson.match(text) is None, direct.match(text) is None)
+
+    def test_nullable_loop(self):
+        direct = compile_dfa("(ab)…", engine="followpos")
+        self.assertIsNotNone(direct.match(""))
+        self.assertIsNotNone(direct.match("abab"))
+        self.assertIsNone(direct.match("aba"))
+
+
+class TestStreamMatcher(unittest.TestCase):
+
+    def test_match_across_chunks(self):
+        matcher = compile_dfa("a(b|c)…d").stream()
+        self.assertEqual(matcher.feed("zzab"), [])
+        self.assertEqual(matcher.feed("cb"), [])
+        result = matcher.feed("dxxad")
+        self.assertEqual([(m.start, m.end, m.full_match) for m in result],
+                         [(2, 7, "abcbd"), (9, 11, "ad")])
+        self.assertEqual(matcher.close(), [])
+
+    def test_leftmost_match_waits_for_earlier_start(self):
+        matcher = compile_dfa("abcd|c").stream()
+        self.assertEqual(matcher.feed("abc"), [])
+        result = matcher.feed("d")
+        self.assertEqual((result[0].start, result[0].end), (0, 4))
+
+    def test_close_flushes_pending(self):
+        matcher = compile_dfa("abcd|b").stream()
+        self.assertEqual(matcher.feed("abc"), [])
+        result = matcher.close()
+        self.assertEqual([(m.start, m.end) for m in result], [(1, 2)])
+
+    def test_buffer_stays_small(self):
+        matcher = compile_dfa("ab").stream()
+        for _ in range(1000):
+            matcher.feed("xyzxa")
+        self.assertLessEqual(len(matcher.buffer), 1)
+        self.assertEqual(matcher.feed("b")[0].start, 4999)
+
+    def test_finditer(self):
+        dfa = compile_dfa("ab…")
+        self.assertEqual([m.full_match for m in dfa.finditer("abbxaab")], ["a", "a", "a"])
+
+
+class TestAsyncSearch(unittest.TestCase):
+
+    def test_stream_reader(self):
+        async def scenario():
+            reader = asyncio.StreamReader()
+            reader.feed_data("zzabbd ab".encode())
+            reader.feed_data("cd жab".encode()[:-3])
+            reader.feed_data("cd жab".encode()[-3:] + b"d")
+            reader.feed_eof()
+            dfa = compile_dfa("a(b|c)…d")
+            return [(m.start, m.full_match) async for m in dfa.afinditer(reader, chunk_size=3)]
+
+        self.assertEqual(asyncio.run(scenario()), [(2, "abbd"), (7, "abcd"), (13, "abd")])
+
+    def test_async_iterator(self):
+        async def chunks():
+            for chunk in ["xa", "bb", "bx", "ab"]:
+                yield chunk
+
+        async def scenario():
+            dfa = compile_dfa("ab…")
+            return [m.start async for m in dfa.afinditer(chunks())]
+
+        self.assertEqual(asyncio.run(scenario()), [1, 6])
+
+
+class TestCodegen(unittest.TestCase):
+
+    def test_generated_module_agrees_with_dfa(self):
+        for _ in range(5):
+            regex = generate_random_regex(3)
+            dfa = compile_dfa(regex)
+            namespace = {}
+            exec(dfa.to_python(), namespace)
+            for text in ["", "a", "ab", "abc", "aaa", "xyz", "abbbbc", "ccccab"]:
+                self.assertEqual(namespace["match"](text), dfa.match(text) is not None)
+                self.assertEqual(namespace["search"](text), find_dfa(dfa.min_dfa, text))
+
+    def test_generated_search_and_escaping(self):
+        namespace = {}
+        exec(compile_dfa("%(%'(b|c)…d").to_python(), namespace)
+        self.assertTrue(namespace["match"]("('bcd"))
+        self.assertEqual(namespace["search"]("xx('bd('d"), (2, 6))
+        self.assertIsNone(namespace["search"]("('b"))
+
+    def test_pattern_with_quotes_and_backslash(self):
+        source = dfa_to_python(compile_dfa("ab").min_dfa, pattern='x"""y\\\n')
+        namespace = {}
+        exec(compile(source, "<generated>", "exec"), namespace)
+        self.assertTrue(namespace["match"]("ab"))
+
+    def test_generated_not_slower_than_accepts_dfa(self):
+        random.seed(7)
+        cases = [
+            ("(a|b)…abb", "".join(random.choice("ab") for _ in range(20000)) + "abb"),
+            ("a(b|c)…d", "a" + "bc" * 10000 + "d"),
+            ("(ab|c)(ab|c)…", "abc" * 7000),
+        ]
+        for pattern, text in cases:
+            dfa = compile_dfa(pattern).min_dfa
+            namespace = {}
+            exec(dfa_to_python(dfa, pattern), namespace)
+            generated = namespace["match"]
+            self.assertEqual(generated(text), accepts_dfa(dfa, text))
+            # Замеры чередуются, чтобы колебания нагрузки доставались обоим поровну
+            fast = plain = float("inf")
+            for _ in range(9):
+                fast = min(fast, timeit.timeit(lambda: generated(text), number=3))
+                plain = min(plain, timeit.timeit(lambda: accepts_dfa(dfa, text), number=3))
+            # Запас на шум измерения; на деле таблица словарей не медленнее
+            self.assertLess(fast, plain * 1.5, pattern)
+
+
+class TestScannerGenerator(unittest.TestCase):
+
+    def setUp(self):
+        digits = "(0|1|2|3|4|5|6|7|8|9)"
+        letters = "(a|b|c|f|i|x|y)"
+        self.scanner = ScannerGenerator([
+            ("IF", "if"),
+            ("ID", f"{letters}({letters}|{digits})…"),
+            ("NUM", f"{digits}{digits}…"),
+            ("ASSIGN", ":="),
+            ("COLON", ":"),
+            ("WS", "( )( )…"),
+        ], ignore={"WS"}).build()
+
+    def test_maximal_munch_and_priority(self):
+        tokens = [(t.type, t.value) for t in self.scanner.tokens("if ifx := 12 x1:")]
+        self.assertEqual(tokens, [("IF", "if"), ("ID", "ifx"), ("ASSIGN", ":="),
+                                  ("NUM", "12"), ("ID", "x1"), ("COLON", ":")])
+
+    def test_positions(self):
+        tokens = list(self.scanner.tokens("a :=b"))
+        self.assertEqual([(t.start, t.end) for t in tokens], [(0, 1), (2, 4), (4, 5)])
+
+    def test_illegal_character(self):
+        with self.assertRaises(ValueError):
+            list(self.scanner.tokens("if ?"))
+
+
+class TestMatchResult(unittest.TestCase):
+
+    def test_lazy_spans(self):
+        text = "xx(abc)yy"
+        result = compile_nfa("(<g>abc)").search(text)
+        self.assertIs(result.string, text)
+        self.assertEqual(result.span(), (3, 6))
+        self.assertEqual(result.span("g"), (3, 6))
+        self.assertEqual(result["g"], "abc")
+        self.assertFalse(hasattr(result, "__dict__"))
+
+    def test_boolean_fast_path(self):
+        dfa = compile_dfa("a(b|c)…")
+        self.assertTrue(dfa.is_match("abcb"))
+        self.assertFalse(dfa.fullmatch_bool("abx"))
+        nfa = compile_nfa("ab")
+        self.assertTrue(nfa.is_match("abc"))
+        self.assertFalse(nfa.fullmatch_bool("abc"))
+        self.assertTrue(nfa.fullmatch_bool("ab"))
+
+    def test_nfa_search_skips_empty_match(self):
+        result = compile_nfa("a…").search("bbaa")
+        self.assertEqual((result.start, result.end), (2, 3))
+
+    def test_nfa_match_is_shortest(self):
+        # Ветка (a)? проходит больше ε-переходов, чем ab, но заканчивается раньше
+        self.assertEqual(compile_nfa("ab|(a)?").match("ab").span(), (0, 1))
+        self.assertEqual(compile_nfa("ab|(a)?").search("xab").span(), (1, 2))
+
+    def test_dfa_search_leftmost_shortest(self):
+        dfa = compile_dfa("ab…")
+        self.assertEqual(dfa.search("xabbx").span(), (1, 2))  # раньше — только суффикс целиком
+        self.assertEqual(dfa.search("xabbx").span(), compile_nfa("ab…").search("xabbx").span())
+        self.assertIsNone(dfa.search("bbb"))
+
+    def test_leftmost_shortest_helper(self):
+        calls = []
+
+        def shortest_end(string, start):  # кратчайшее непустое "a+"
+            calls.append(start)
+            return start + 1 if string[start] == "a" else -1
+
+        self.assertEqual(leftmost_shortest(shortest_end, "xxaab", 1), (2, 3))
+        self.assertEqual(calls, [1, 2])
+        calls.clear()
+        self.assertEqual(leftmost_shortest(shortest_end, "xxaab", first="a"), (2, 3))
+        self.assertEqual(calls, [2])  # позиции с "x" отброшены до вызова
+        self.assertIsNone(leftmost_shortest(shortest_end, "xxaab", stop=2))
+        find = lambda string, pos: leftmost_shortest(shortest_end, string, pos)
+        self.assertEqual(list(iter_spans(find, "abaa")), [(0, 1), (2, 3), (3, 4)])
+
+
+class TestPlanner(unittest.TestCase):
+
+    def test_engine_choice(self):
+        self.assertEqual(MyRegex.compile("ab{3}").plan.engine, "literal")
+        self.assertEqual(MyRegex.compile("a(b|c)…d").plan.engine, "dfa")
+        self.assertEqual(MyRegex.compile("(a|b)…a(a|b){12}").plan.engine, "bitparallel")
+        self.assertEqual(MyRegex.compile("(a|b)…a(a|b){70}").plan.engine, "lazy_dfa")
+        self.assertEqual(MyRegex.compile("(<g>a|b)<g>").plan.engine, "nfa")
+
+    def test_same_results_for_every_engine(self):
+        text = "zzabababbbab"
+        for pattern in ["abab", "a(b|c)…a", "(a|b)…a(a|b){3}", "(<g>ab)<g>"]:
+            compiled = MyRegex.compile(pattern)
+            nfa = compile_nfa(pattern)
+            expected = nfa.search(text)
+            result = compiled.search(text)
+            self.assertEqual((result.start, result.end), (expected.start, expected.end), compiled.plan)
+
+    def test_groups_with_fast_engine(self):
+        compiled = MyRegex.compile("x(<g>ab…)y")
+        self.assertEqual(compiled.plan.engine, "dfa")
+        result = compiled.search("zzxabbyab")
+        self.assertEqual(result["g"], "abb")
+        self.assertEqual(result.span("g"), (3, 6))
+        self.assertTrue(compiled.is_match("xaby"))
+        self.assertIsNone(compiled.match("xaby!"))
+
+
+class TestLiteralFastPath(unittest.TestCase):
+
+    def test_escaped_literal(self):
+        compiled = MyRegex.compile("%(%a%|%b%)%")
+        self.assertEqual(compiled.plan.engine, "literal")
+        result = compiled.search("xx(a|b)")
+        self.assertEqual((result.start, result.full_match), (2, "(a|b)"))
+        self.assertIsNotNone(compiled.match("(a|b)"))
+
+    def test_alternation_of_literals(self):
+        compiled = MyRegex.compile("abcd|bc|x(y|z)")
+        self.assertEqual(compiled.plan.engine, "literals")
+        self.assertEqual([m.full_match for m in compiled.finditer("zabcdxzbc")], ["abcd", "xz", "bc"])
+        self.assertTrue(compiled.is_match("xy"))
+        self.assertFalse(compiled.is_match("x"))
+
+    def test_shortest_at_leftmost_start(self):
+        compiled = MyRegex.compile("abc|ab|b")
+        result = compiled.search("xabc")
+        self.assertEqual((result.start, result.end), (1, 3))
+
+
+class TestLanguageChecks(unittest.TestCase):
+
+    def test_equivalent(self):
+        self.assertTrue(compile_dfa("a(b|c)…").equivalent(compile_dfa("a(c|b)…(b|c)?")))
+        result = compile_dfa("ab…").equivalent(compile_dfa("abb…"))
+        self.assertFalse(result)
+        self.assertEqual(result.counterexample, "a")
+
+    def test_subset(self):
+        self.assertTrue(compile_dfa("ab{2}").is_subset_of(compile_dfa("ab…")))
+        result = compile_dfa("a(b|c)").is_subset_of(compile_dfa("ab…"))
+        self.assertFalse(result)
+        self.assertEqual(result.counterexample, "ac")
+
+    def test_empty(self):
+        dfa1 = compile_dfa("abc")
+        self.assertEqual(dfa1.is_empty().counterexample, "abc")
+        self.assertTrue(dfa_is_empty(dfa1.intersect(compile_dfa("xyz"))))
+
+
+class TestBudget(unittest.TestCase):
+
+    def test_state_budget_falls_back(self):
+        with self.assertWarns(BudgetFallbackWarning):
+            dfa = compile_dfa("(a|b)…a(a|b){14}", budget=Budget(max_states=500))
+        self.assertIsInstance(dfa.fallback, BudgetExceeded)
+        self.assertEqual(dfa.fallback.resource, "states")
+        self.assertTrue(dfa.is_match("ab" + "a" * 15))
+        self.assertIsNone(dfa.match("b" * 15))
+        with self.assertRaises(BudgetExceeded):
+            dfa.complement_dfa()
+
+    def test_matching_after_fallback(self):
+        pattern = "(a|b)…a(a|b){8}"
+        with self.assertWarns(BudgetFallbackWarning):
+            dfa = compile_dfa(pattern, budget=Budget(max_states=20))
+        full = compile_dfa(pattern)
+        text = "b" + "ab" * 6 + "é" + "a" * 12
+        spans = [m.span() for m in full.finditer(text)]
+        byte_spans = [m.span() for m in full.finditer(text.encode())]
+        self.assertEqual([m.span() for m in dfa.finditer(text)], spans)
+        self.assertEqual([m.span() for m in dfa.finditer(text.encode())], byte_spans)
+        self.assertEqual(dfa.search(memoryview(text.encode())).span(), byte_spans[0])
+        self.assertIsNotNone(dfa.match(("a" * 10).encode()))
+        self.assertFalse(dfa.is_match(bytearray(b"\xffa")))
+        matcher = dfa.stream()
+        found = matcher.feed(text[:7]) + matcher.feed(text[7:]) + matcher.close()
+        self.assertEqual([m.span() for m in found], spans)
+
+        async def scenario():
+            reader = asyncio.StreamReader()
+            reader.feed_data(text.encode())
+            reader.feed_eof()
+            return [m.span() async for m in dfa.afinditer(reader, chunk_size=5)]
+
+        self.assertEqual(asyncio.run(scenario()), spans)
+        with self.assertRaises(BudgetExceeded):
+            dfa.bytes_dfa
+
+    def test_fallback_with_references(self):
+        with self.assertWarns(BudgetFallbackWarning):
+            dfa = compile_dfa("(<g>a|b)<g>", budget=Budget(max_states=1))
+        self.assertEqual([m.span() for m in dfa.finditer("xaabbab")], [(1, 3), (3, 5)])
+        self.assertEqual([m.span() for m in dfa.finditer("éaa".encode())], [(2, 4)])
+        matcher = dfa.stream()
+        self.assertEqual([m.span() for m in matcher.feed("xa") + matcher.feed("ab") + matcher.close()], [(1, 3)])
+
+    def test_within_budget(self):
+        dfa = compile_dfa("a(b|c)…", budget=Budget(max_states=10, max_memory=10 ** 6, max_seconds=10))
+        self.assertIsNone(dfa.fallback)
+        self.assertIsNotNone(dfa.match("abcb"))
+
+    def test_product_budget(self):
+        dfa1 = compile_dfa("(a|b)…a(a|b){5}")
+        dfa2 = compile_dfa("(a|b)…b(a|b){5}")
+        with self.assertRaises(BudgetExceeded):
+            intersect_dfa(dfa1.dfa, dfa2.dfa, Budget(max_states=100))
+
+    def test_planner_respects_budget(self):
+        compiled = MyRegex.compile("(a|b)…a(a|b){12}", budget=Budget(max_states=50))
+        self.assertEqual(compiled.plan.engine, "bitparallel")
+
+
+class TestBytes(unittest.TestCase):
+
+    def test_bytes_like_inputs(self):
+        dfa = compile_dfa("a(é|ж)…b")
+        data = "aéжb".encode()
+        self.assertTrue(dfa.is_match(data))
+        self.assertTrue(dfa.is_match(bytearray(data)))
+        self.assertIsNotNone(dfa.match(memoryview(data)))
+        self.assertFalse(dfa.is_match(data[:-2]))  # обрезанный многобайтовый символ
+
+    def test_byte_offsets(self):
+        dfa = compile_dfa("€|aéb")
+        data = "x€yaébz€".encode()
+        spans = [m.span() for m in dfa.finditer(data)]
+        self.assertEqual(spans, [(1, 4), (5, 9), (10, 13)])
+        self.assertEqual(dfa.search(data).full_match, "€".encode())
+
+    def test_agrees_with_str(self):
+        for _ in range(100):
+            pattern = generate_random_regex()
+            dfa = compile_dfa(pattern)
+            for _ in range(5):
+                s = "".join(random.choice("abé") for _ in range(random.randint(0, 8)))
+                expected = [(len(s[:a].encode()), len(s[:b].encode()))
+                            for a, b in (m.span() for m in dfa.finditer(s))]
+                self.assertEqual([m.span() for m in dfa.finditer(s.encode())], expected)
+                self.assertEqual(dfa.is_match(s), dfa.is_match(s.encode()))
+
+    def test_complement_covers_all_bytes(self):
+        complement = compile_dfa("ab").bytes_dfa.complement()
+        self.assertTrue(complement.accepts(b"\xff\xfe"))
+        self.assertFalse(complement.accepts(b"ab"))
+
+
+class TestThreadSafety(unittest.TestCase):
+
+    def test_compiled_objects_are_immutable(self):
+        for compiled in (compile_dfa("ab"), compile_nfa("ab"), compile_glushkov("ab"), MyRegex.compile("ab")):
+            with self.assertRaises(AttributeError):
+                compiled.pattern = "cd"
+
+    def test_complement_keeps_source(self):
+        dfa = compile_dfa("a(b|c)…")
+        states = len(dfa.dfa.states)
+        complement = dfa.complement_dfa()
+        self.assertEqual(len(dfa.dfa.states), states)
+        self.assertTrue(dfa.is_match("abc"))
+        self.assertFalse(match_dfa(complement, "abc"))
+
+    def test_lazy_parts_built_once(self):
+        dfa = compile_dfa("(a|b)…abb")
+        with ThreadPoolExecutor(8) as pool:
+            built = set(pool.map(lambda _: id(dfa.min_dfa), range(64)))
+        self.assertEqual(len(built), 1)
+
+    def test_match_many(self):
+        strings = ["".join(random.choice("abcx") for _ in range(random.randint(0, 6))) for _ in range(50)]
+        for compiled in (compile_dfa("a(b|c)…"), MyRegex.compile("(<x>ab)|c")):
+            self.assertEqual([m and m.span() for m in compiled.search_many(strings, max_workers=4)],
+                             [m and m.span() for m in map(compiled.search, strings)])
+            with ThreadPoolExecutor(4) as pool:
+                self.assertEqual([m is not None for m in compiled.match_many(strings, executor=pool)],
+                                 [compiled.match(s) is not None for s in strings])
+
+    def test_process_pool(self):
+        strings = ["".join(random.choice("abcx") for _ in range(random.randint(0, 6))) for _ in range(20)]
+        compiled_objects = (compile_dfa("a(b|c)…"), compile_nfa("a(b|c)…"), MyRegex.compile("(<x>ab)|c"),
+                            compile_words(["ab", "ac", "b" * 400]))  # у словаря нет шаблона — передаётся сам ДКА
+        with ProcessPoolExecutor(2) as pool:
+            for compiled in compiled_objects:
+                self.assertEqual([m and (m.span(), m.spans) for m in compiled.search_many(strings, executor=pool)],
+                                 [m and (m.span(), m.spans) for m in map(compiled.search, strings)])
+        rebuilt = pickle.loads(pickle.dumps(compiled_objects[0]))
+        self.assertIs(pickle.loads(pickle.dumps(compiled_objects[0])), rebuilt)  # собирается один раз на процесс
+        words = pickle.loads(pickle.dumps(compiled_objects[3]))
+        self.assertIs(pickle.loads(pickle.dumps(compiled_objects[3])), words)
+
+    def test_rebuild_cache(self):
+        MyRegex._rebuilt.clear()
+        for n in range(MyRegex.REBUILT_CACHE_SIZE + 10):
+            pickle.loads(pickle.dumps(compile_dfa("a" * (n + 1))))
+        self.assertEqual(len(MyRegex._rebuilt), MyRegex.REBUILT_CACHE_SIZE)
+        # Пределы Budget входят в ключ, а сам объект Budget — нет
+        first = pickle.loads(pickle.dumps(compile_dfa("ab", budget=Budget(max_states=100))))
+        self.assertIs(pickle.loads(pickle.dumps(compile_dfa("ab", budget=Budget(max_states=100)))), first)
+        self.assertIsNot(pickle.loads(pickle.dumps(compile_dfa("ab", budget=Budget(max_states=50)))), first)
+
+    def test_profiled_copies_are_independent(self):
+        plain = compile_dfa("ab…")
+        self.assertIs(copy.copy(plain), plain)
+        self.assertIs(copy.deepcopy(plain), plain)
+        profiled = compile_dfa("ab…", profile=True)
+        for clone in (pickle.loads(pickle.dumps(profiled)), copy.copy(profiled), copy.deepcopy(profiled)):
+            self.assertIsNot(clone, profiled)
+            self.assertIsNot(clone.stats, profiled.stats)
+            clone.match("abb")
+        self.assertIsNot(pickle.loads(pickle.dumps(profiled)), pickle.loads(pickle.dumps(profiled)))
+        self.assertEqual(profiled.stats.state_visits, {})
+
+
+class TestCounting(unittest.TestCase):
+
+    def test_counts(self):
+        dfa = compile_dfa("a(b|c)…")
+        self.assertEqual([dfa.count(n) for n in range(5)], [0, 1, 2, 4, 8])
+        self.assertEqual(dfa.count_upto(4), 15)
+
+    def test_big_lengths(self):
+        self.assertEqual(compile_dfa("(a|b|c)…").count(500), 3 ** 500)
+        self.assertEqual(compile_dfa("(a|b)…").count_upto(100), 2 ** 101 - 1)
+
+    def test_agrees_with_enumeration(self):
+        for _ in range(50):
+            dfa = compile_dfa(generate_random_regex())
+            alphabet = sorted({ch for state in dfa.min_dfa.states for ch in state.transitions})
+            for n in range(4):
+                words = ("".join(w) for w in itertools.product(alphabet, repeat=n))
+                self.assertEqual(dfa.count(n), sum(dfa.is_match(w) for w in words))
+
+    def test_negative_length(self):
+        with self.assertRaises(ValueError):
+            compile_dfa("a").count(-1)
+
+
+class TestSampling(unittest.TestCase):
+
+    def test_enumerate_shortlex(self):
+        dfa = compile_dfa("a(b|c)…")
+        self.assertEqual(list(dfa.enumerate(3)), ["a", "ab", "ac", "abb", "abc", "acb", "acc"])
+        self.assertEqual(list(compile_dfa("ab").enumerate(1)), [])
+
+    def test_enumerate_matches_count(self):
+        for _ in range(50):
+            dfa = compile_dfa(generate_random_regex())
+            words = list(dfa.enumerate(4))
+            self.assertEqual(len(words), dfa.count_upto(4))
+            self.assertTrue(all(dfa.is_match(w) for w in words))
+            self.assertEqual(words, sorted(words, key=lambda w: (len(w), w)))
+
+    def test_sample(self):
+        dfa = compile_dfa("a…b|ab…")
+        rng = random.Random(7)
+        samples = [dfa.sample(4, rng) for _ in range(2000)]
+        self.assertEqual(set(samples), {"aaab", "abbb"})
+        self.assertGreater(samples.count("aaab"), 800)
+        self.assertEqual(dfa.sample(4, random.Random(1)), dfa.sample(4, random.Random(1)))
+        with self.assertRaises(ValueError):
+            compile_dfa("ab").sample(3)
+
+
+class TestAcceleration(unittest.TestCase):
+
+    def test_marks_loop_states(self):
+        dfa = compile_dfa("a(b|c)…d")
+        self.assertTrue(dfa.min_dfa.accelerated)
+        loops = [state for state in dfa.min_dfa.states if state.skip is not None]
+        self.assertEqual(len(loops), 1)
+        self.assertTrue(compile_dfa("xa…y").min_dfa.accelerated)  # одна петля и один выход
+        self.assertFalse(compile_dfa("abc").min_dfa.accelerated)  # петель нет
+
+    def test_compiled_api_skips(self):
+        # match/search/is_match проходят серию одним вызовом skip
+        dfa = compile_dfa("xa…y")
+        state = next(state for state in dfa.min_dfa.states if state.skip is not None)
+        calls = []
+        skip = state.skip
+        state.skip = lambda string, pos: calls.append(pos) or skip(string, pos)
+        text = "x" + "a" * 10000 + "y"
+        self.assertTrue(dfa.is_match(text))
+        self.assertEqual(dfa.match(text).span(), (0, len(text)))
+        self.assertEqual(dfa.search("zz" + text).span(), (2, len(text) + 2))
+        self.assertGreaterEqual(len(calls), 3)
+        self.assertLessEqual(len(calls), 10)
+
+    def test_long_runs(self):
+        dfa = compile_dfa("a(b|c)…d").min_dfa
+        text = "a" + "bc" * 5000 + "d"
+        self.assertTrue(accepts_dfa(dfa, text))
+        self.assertFalse(accepts_dfa(dfa, text + "d"))
+        self.assertFalse(accepts_dfa(dfa, text[:-1]))
+        self.assertEqual(find_dfa(dfa, "xx" + text), (2, len(text) + 2))
+
+    def test_agrees_with_plain_dfa(self):
+        for _ in range(100):
+            pattern = generate_random_regex()
+            plain = minimize_dfa(compile_dfa(pattern).dfa)
+            fast = minimize_dfa(compile_dfa(pattern).dfa)
+            accelerate_dfa(fast)
+            for _ in range(5):
+                s = "".join(random.choice("abc") * random.randint(1, 5) for _ in range(random.randint(0, 5)))
+                self.assertEqual(accepts_dfa(fast, s), accepts_dfa(plain, s))
+                self.assertEqual(find_dfa(fast, s), find_dfa(plain, s))
+
+
+class TestStdlibLowering(unittest.TestCase):
+
+    @staticmethod
+    def _tree(pattern):
+        return MyRegex.RegexParser(MyRegex.RegexLexer(pattern).lex()).parse()
+
+    def test_to_re(self):
+        self.assertEqual(to_re(self._tree("a(b|c)…d")), "a(?:b|c)*d")
+        self.assertEqual(to_re(self._tree("(<x>a%|%b)?c{2}")), r"(?P<x>a\|b)?c{2}")
+        self.assertEqual(to_re(self._tree("%(%a%.%")), r"\(a\.")
+
+    def test_unsupported(self):
+        self.assertIsNone(unsupported(self._tree("a(b|c)…d")))
+        self.assertIn("reference", unsupported(self._tree("(<g>a)<g>")))
+        self.assertIn("duplicate", unsupported(self._tree("(<g>a)(<g>b)")))
+        self.assertIn("nested", unsupported(self._tree("(a…b)…")))
+        self.assertIn("closures", unsupported(self._tree("a…a…")))
+        self.assertIn("closures", unsupported(self._tree("a…(a|b)a…")))
+        self.assertIn("closures", unsupported(self._tree("(a…|b)a…")))
+        self.assertIn("optional", unsupported(self._tree("a?" * 9)))
+        # Замыкания над разными символами или разделённые чужим символом — не перебор
+        for pattern in ("a…b…c…", "a…xa…", "(<g>a…)b(a|c)…", "a?a?", "a…a?"):
+            self.assertIsNone(unsupported(self._tree(pattern)), pattern)
+
+    def test_ambiguity_rule_keeps_re_fast(self):
+        # То, что отвергается, на re действительно растёт как степень длины строки
+        regex = re.compile(to_re(self._tree("a…a…b")))
+        slow = timeit.timeit(lambda: regex.fullmatch("a" * 2000), number=1)
+        regex = re.compile(to_re(self._tree("a…b…c")))
+        fast = timeit.timeit(lambda: regex.fullmatch("a" * 2000), number=1)
+        self.assertGreater(slow, fast * 10)
+
+    def test_shortest_from_re(self):
+        self.assertEqual(shortest_re(self._tree("xa…y")), "xa*?y")
+        self.assertIsNone(shortest_re(self._tree("a…")))         # пустое совпадение
+        self.assertIsNone(shortest_re(self._tree("ab|a")))       # альтернатива разной длины
+        self.assertIsNone(shortest_re(self._tree("a…bc…d")))     # два квантификатора
+        compiled = MyRegex.compile("x(a|b)…y", debug=True)
+        self.assertEqual(compiled.plan.features["stdlib_shortest"], "x(?:a|b)*?y")
+        self.assertEqual([m.span() for m in compiled.finditer("xayxbbyxy")], [(0, 3), (3, 7), (7, 9)])
+        for _ in range(200):
+            pattern = generate_random_regex()
+            shortest = shortest_re(self._tree(pattern))
+            if shortest is None:
+                continue
+            regex, dfa = re.compile(shortest), compile_dfa(pattern).min_dfa
+            for _ in range(10):
+                s = "".join(random.choice("abc") for _ in range(random.randint(0, 9)))
+                found = regex.search(s)
+                self.assertEqual(found and found.span(), find_dfa(dfa, s))
+
+    def test_same_language(self):
+        for _ in range(100):
+            pattern = generate_random_regex()
+            regex = re.compile(to_re(self._tree(pattern)))
+            dfa = compile_dfa(pattern)
+            for _ in range(5):
+                s = "".join(random.choice("abc") for _ in range(random.randint(0, 7)))
+                self.assertEqual(regex.fullmatch(s) is not None, dfa.is_match(s))
+
+    def test_planner_uses_stdlib(self):
+        compiled = MyRegex.compile("x(<num>a(b|c)…)y", debug=True)
+        self.assertEqual(compiled.plan.features["stdlib"], "x(?P<num>a(?:b|c)*)y")
+        result = compiled.search("zzxabcby")
+        self.assertEqual(result.span(), (2, 8))
+        self.assertEqual(result["num"], "abcb")
+        self.assertIsNone(compiled.match("xay!"))
+
+    def test_groups_come_from_nfa(self):
+        # re отдаёт захваты иначе (g=(0, 1), h=(1, 1)); группы не должны зависеть от движка
+        cases = [("(<g>a?)(<h>a?)", "a"), ("(<g>a)?(<h>a?)", "a"), ("x(<g>a?)(<h>a…)", "xaa")]
+        for pattern, s in cases:
+            compiled = MyRegex.compile(pattern, debug=True)  # debug сверяет группы с НКА
+            self.assertIsNotNone(compiled.plan.features["stdlib"])
+            self.assertIsNotNone(compiled.match(s))
+            self.assertIsNotNone(compiled.search(s))
+        result = MyRegex.compile("(<g>a?)(<h>a?)").match("a")
+        self.assertEqual((result.span("g"), result.span("h")), ((0, 0), (0, 1)))
+
+    def test_debug_cross_check(self):
+        for _ in range(50):
+            pattern = generate_random_regex()
+            compiled = MyRegex.compile(f"(<g>{pattern})", debug=True)
+            for _ in range(5):
+                s = "".join(random.choice("abc") for _ in range(random.randint(0, 8)))
+                compiled.match(s)
+                list(compiled.finditer(s))  # AssertionError при расхождении с НКА
+
+
+class TestLanguageCombinators(unittest.TestCase):
+
+    def test_difference(self):
+        words = compile_dfa("a(b|c)…") & ~compile_dfa("a(b|c)…c")
+        self.assertTrue(words.accepts("abcb"))
+        self.assertFalse(words.accepts("abbc"))
+        self.assertFalse(words.accepts("x"))
+        self.assertEqual(words.find("xxabcbc"), (2, 3))
+
+    def test_abstract_base(self):
+        with self.assertRaises(TypeError):
+            MyRegex.LanguageExpr()
+
+    def test_union_with_complement(self):
+        expr = ~compile_dfa("a…") | compile_dfa("aa")
+        self.assertTrue(expr.accepts("aa"))
+        self.assertTrue(expr.accepts("b"))    # дополнение — до всех строк
+        self.assertFalse(expr.accepts("aaa"))
+        self.assertEqual(str(compile_dfa("a") & ~compile_dfa("b")), "a & ~b")
+
+    def test_agrees_with_product(self):
+        for _ in range(50):
+            patterns = [generate_random_regex() for _ in range(2)]
+            alphabet = sorted({ch for p in patterns for ch in p if ch.isalpha()})[:4]
+            first, second = (compile_dfa(p) for p in patterns)
+            product = intersect_dfa(first.min_dfa, MyRegex.complement_dfa(second.min_dfa))
+            lazy = first & ~second
+            for _ in range(10):
+                s = "".join(random.choice(alphabet) for _ in range(random.randint(0, 6)))
+                self.assertEqual(lazy.accepts(s), accepts_dfa(product, s))
+                self.assertEqual(lazy.find(s), find_dfa(product, s))
+
+
+class TestSetAlgebra(unittest.TestCase):
+
+    def test_evaluate(self):
+        algebra = SetAlgebra()
+        ab = algebra.leaf(compile_dfa("a(b|c)…"))
+        ends_c = algebra.leaf(compile_dfa("(a|b|c)…c"))
+        result = MyRegex.CompiledDFA.from_dfa(algebra.evaluate((ab - ends_c) | (ab & ends_c)), minimal=True)
+        self.assertTrue(result.equivalent(compile_dfa("a(b|c)…")))
+        self.assertIsNotNone(result.search("xxabc"))
+
+    def test_shared_languages(self):
+        algebra = SetAlgebra()
+        first = algebra.leaf(compile_dfa("a(b|c)…"))
+        second = algebra.leaf(compile_dfa("a|a(c|b)…"))
+        self.assertEqual(algebra.language(first), algebra.language(second))
+        algebra.language(first & algebra.leaf(compile_dfa("ab…")))
+        products = len(algebra.products)
+        algebra.language(algebra.leaf(compile_dfa("ab…")) & second)  # тот же продукт, аргументы переставлены
+        self.assertEqual(len(algebra.products), products)
+
+    def test_canonical_after_dead_branches(self):
+        algebra = SetAlgebra()
+        both = algebra.leaf(compile_dfa("ab|adx|cb")) & algebra.leaf(compile_dfa("ab|ady|cb"))
+        self.assertEqual(algebra.language(both), algebra.language(algebra.leaf(compile_dfa("ab|cb"))))
+        self.assertEqual(len(algebra.evaluate(both).states), 3)
+
+    def test_agrees_with_membership(self):
+        algebra = SetAlgebra()
+        for _ in range(20):
+            patterns = [generate_random_regex() for _ in range(3)]
+            alphabet = sorted({ch for p in patterns for ch in p if ch.isalpha()})[:4]
+            dfas = [compile_dfa(p) for p in patterns]
+            a, b, c = (algebra.leaf(d) for d in dfas)
+            result = algebra.evaluate((a & b) | (c - a) | (~b & a))
+            for _ in range(10):
+                s = "".join(random.choice(alphabet) for _ in range(random.randint(0, 6)))
+                x, y, z = (d.is_match(s) for d in dfas)
+                self.assertEqual(accepts_dfa(result, s), (x and y) or (z and not x) or (x and not y))
+
+    def test_process_pool(self):
+        algebra = SetAlgebra(processes=2)
+        a, b, c = (algebra.leaf(compile_dfa(p)) for p in ("a(b|c)…", "(a|b)…b", "ab…"))
+        result = algebra.evaluate((a & b) | (b - c))
+        self.assertTrue(accepts_dfa(result, "ab"))
+        self.assertTrue(accepts_dfa(result, "bab"))
+        self.assertFalse(accepts_dfa(result, "abc"))
+
+
+class TestWordList(unittest.TestCase):
+
+    def test_matches_alternation(self):
+        for _ in range(50):
+            words = ["".join(random.choice("abc") for _ in range(random.randint(1, 5)))
+                     for _ in range(random.randint(1, 10))]
+            compiled = compile_words(words)
+            self.assertTrue(compiled.equivalent(compile_dfa("|".join(words))))
+            self.assertEqual(len(compiled.dfa.states), len(minimize_dfa(compiled.dfa).states))
+
+    def test_unsorted_and_duplicates(self):
+        compiled = compile_words(["tap", "top", "taps", "tops", "top", ""])
+        self.assertEqual(len(compiled.dfa.states), 5)  # общие префиксы и суффиксы слиты
+        self.assertTrue(compiled.is_match(""))
+        self.assertTrue(compiled.is_match("taps"))
+        self.assertFalse(compiled.is_match("tip"))
+        self.assertEqual(compiled.search("stops").span(), (1, 4))
+        self.assertEqual(list(compiled.enumerate(3)), ["", "tap", "top"])
+
+    def test_sorted_order_enforced(self):
+        with self.assertRaises(ValueError):
+            compile_words(["b", "a"], assume_sorted=True)
+
+    def test_set_operations(self):
+        compiled = compile_words(["ab", "abc", "b"])
+        self.assertTrue(compiled.is_subset_of(compile_dfa("a…b…c?")))
+        self.assertFalse(compiled.is_subset_of(compile_dfa("ab…")))
+
+
+class TestAhoCorasick(unittest.TestCase):
+
+    def test_finditer(self):
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        self.assertEqual(list(automaton.finditer("ushers")), [(1, 1, 4), (0, 2, 4), (3, 2, 6)])
+        self.assertEqual(list(automaton.finditer("ushers", 2)), [(0, 2, 4), (3, 2, 6)])
+
+    def test_full_dfa(self):
+        automaton = AhoCorasick(["ab", "bc"])
+        for state in automaton.dfa.states:
+            self.assertEqual(set(state.transitions), {"a", "b", "c"})  # fail-ссылки свёрнуты в переходы
+
+    def test_agrees_with_naive_scan(self):
+        for _ in range(100):
+            keywords = list({"".join(random.choice("abc") for _ in range(random.randint(1, 4)))
+                             for _ in range(random.randint(1, 8))})
+            text = "".join(random.choice("abcd") for _ in range(random.randint(0, 20)))
+            expected = sorted((kid, start, start + len(word)) for kid, word in enumerate(keywords)
+                              for start in range(len(text)) if text.startswith(word, start))
+            self.assertEqual(sorted(AhoCorasick(keywords).finditer(text)), expected)
+
+    def test_empty_keyword(self):
+        with self.assertRaises(ValueError):
+            AhoCorasick(["a", ""])
+
+
+def _shared_search(args):
+    shared, string = args
+    return shared.find(string)
+
+
+class TestSharedMemory(unittest.TestCase):
+
+    def test_attach_by_name(self):
+        dfa = compile_dfa("(ab|c)…d")
+        with dfa.share() as shared:
+            attached = SharedDFA.attach(shared.name)
+            self.assertTrue(attached.accepts("abcd"))
+            self.assertFalse(attached.accepts("abx"))
+            self.assertEqual(attached.search("xxabcd").span(), (2, 6))
+            attached.close()
+
+    def test_agrees_with_dfa(self):
+        for _ in range(50):
+            dfa = compile_dfa(generate_random_regex())
+            with dfa.share() as shared:
+                for _ in range(10):
+                    s = "".join(random.choice("abcx") for _ in range(random.randint(0, 8)))
+                    self.assertEqual(shared.accepts(s), dfa.is_match(s))
+                    self.assertEqual([m.span() for m in shared.finditer(s)], [m.span() for m in dfa.finditer(s)])
+
+    def test_pickles_by_name(self):
+        dfa = compile_dfa("ab{300}c")  # граф DFAState такой глубины pickle не осиливает
+        with dfa.share() as shared:
+            self.assertLess(len(pickle.dumps(shared)), 100)
+            with ProcessPoolExecutor(2) as pool:
+                texts = ["x" + "a" + "b" * 300 + "c", "abc"]
+                self.assertEqual(list(pool.map(_shared_search, [(shared, t) for t in texts])), [(1, 303), None])
+
+
 if __name__ == "__main__":
     unittest.main()